@@ -4,4 +4,4 @@ from .listitem import *
 from .site import *
 from .field import *
 
-__all__ = [SharepointApi, Site, SpList, ListItem, AttributeMap, FieldEnum]
\ No newline at end of file
+__all__ = [SharepointApi, Site, SpList, ListItem, AttributeMap, FieldEnum, FieldSpec]
\ No newline at end of file
@@ -7,11 +7,16 @@ All requests are passed through the http variable, which is a requests session s
 error codes.
 """
 
+import json
+import re
+import threading
+import time
 import urllib
+import uuid
 from urllib.parse import urlparse
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from .errors import SharePointRequestError
+from .errors import SharePointConcurrencyError, SharePointRequestError
 
 import requests
 from requests import Request, Session
@@ -19,6 +24,56 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 
+class BatchResponse():
+    """The response to a single request sent inside a $batch call"""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text) if self.text else None
+
+    def __repr__(self):
+        return "<BatchResponse [{0}]>".format(self.status_code)
+
+
+class RateLimiter():
+    """Spaces calls to acquire() so that at most requests_per_second of them return per second, shared by
+    all threads using the limiter
+    """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(self._next, now) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _InFlightRequest():
+    """A request that is currently being sent on behalf of one or more callers.
+    The first caller sends it, the rest wait on the event and share the result
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+
+
 class BaseSharepointApi():
     def __init__(self, site_url, client_id, client_secret):
         self.token = None
@@ -71,13 +126,13 @@ class BaseSharepointApi():
     def _get_session(self):
         raise NotImplementedError()
 
-    def _send(self, request):
+    def _send(self, request, stream=False):
         raise NotImplementedError()
 
     def delete(self, url, **kwargs):
         raise NotImplementedError()
 
-    def get(self, url, **kwargs):
+    def get(self, url, stream=False, **kwargs):
         raise NotImplementedError()
 
     def patch(self, url, data=None, json=None, **kwargs):
@@ -91,12 +146,31 @@ class BaseSharepointApi():
 
 
 class SharepointApi(BaseSharepointApi):
+    # refresh the form digest this many seconds before SharePoint expires it
+    form_digest_margin = 60
+    # SharePoint rejects $batch calls with more than 100 requests
+    max_batch_size = 100
+
     def __init__(self, site_url, client_id, client_secret):
         super().__init__(site_url, client_id, client_secret)
 
         self._session = self._get_session()
         self._set_initial_headers(self._session)
 
+        self._token_lock = threading.Lock()
+        self._digest_lock = threading.Lock()
+        self._form_digest = None
+        self._form_digest_expires = None
+        self._inflight_lock = threading.Lock()
+        self._inflight = {}
+
+        # counters for reporting, retries are the ones done by the urllib3 Retry of the session adapter
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        # optional RateLimiter applied to every request sent
+        self.rate_limiter = None
+
     def _get_header_access_token(self):
         """Returns header access token - this token has to be included in every request to SharePoint """
 
@@ -111,10 +185,29 @@ class SharepointApi(BaseSharepointApi):
             'Content-Type': 'application/x-www-form-urlencoded',
         }
 
-        if not self.token or datetime.now() >= datetime.fromtimestamp(int(self.token['expires_on'])):
-            self.token = requests.get(url, headers=headers, data=data).json()
+        # only one thread fetches a new token, the others wait and reuse it
+        with self._token_lock:
+            if not self.token or datetime.now() >= datetime.fromtimestamp(int(self.token['expires_on'])):
+                self.token = requests.get(url, headers=headers, data=data).json()
+
+            token = self.token
 
-        return ' '.join([self.token['token_type'], self.token['access_token']])
+        return ' '.join([token['token_type'], token['access_token']])
+
+    def _get_form_digest(self):
+        """Returns the form digest value, fetching a new one from contextinfo only when the cached one is
+        missing or about to expire. Concurrent callers share a single refresh
+        """
+
+        with self._digest_lock:
+            if self._form_digest is None or datetime.now() >= self._form_digest_expires:
+                data = self.contextinfo
+                timeout = int(data.get('FormDigestTimeoutSeconds', 1800))
+                self._form_digest = data['FormDigestValue']
+                self._form_digest_expires = datetime.now() + timedelta(
+                    seconds=max(timeout - self.form_digest_margin, 0))
+
+            return self._form_digest
 
     def _get_session(self):
         requests_session = Session()
@@ -141,16 +234,23 @@ class SharepointApi(BaseSharepointApi):
         })
 
     def _update_headers(self, request):
+        form_digest = self._get_form_digest()
+
+        # json bodies are sent as verbose, anything else (multipart batches, file content) keeps its own type
+        content_type = request.headers.get('content-type', 'application/json')
+        if content_type.startswith('application/json'):
+            content_type = "application/json;odata=verbose"
+
         method_headers = {
-            "POST": {"content-type": "application/json;odata=verbose",
-                     "X-RequestDigest": self.contextinfo['FormDigestValue']},
+            "POST": {"content-type": content_type,
+                     "X-RequestDigest": form_digest},
             "DELETE": {
                 'X-HTTP-Method': 'DELETE',
-                'IF-MATCH': '*',
-                "X-RequestDigest": self.contextinfo['FormDigestValue']},
+                'IF-MATCH': request.headers.get('IF-MATCH', '*'),
+                "X-RequestDigest": form_digest},
             "PATCH": {
                 'X-HTTP-Method': 'MERGE',
-                'IF-MATCH': '*',
+                'IF-MATCH': request.headers.get('IF-MATCH', '*'),
             }
         }
 
@@ -164,7 +264,7 @@ class SharepointApi(BaseSharepointApi):
 
         return request
 
-    def _send(self, request):
+    def _send(self, request, stream=False):
         try:
             request.url = self._api_endpoint(request.url)
 
@@ -176,13 +276,33 @@ class SharepointApi(BaseSharepointApi):
             request = self._session.prepare_request(request)
             request = self._update_headers(request)
 
-            resp = self._session.send(request)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            resp = self._session.send(request, stream=stream)
+            self._count_request(resp)
             resp.raise_for_status()
             return resp
+        except requests.exceptions.HTTPError as err:
+            # 412 means the IF-MATCH etag no longer matches the item on the server
+            status_code = err.response.status_code if err.response is not None else None
+            if status_code == 412:
+                raise SharePointConcurrencyError(
+                    "SharePoint {0} request failed, item was changed by someone else".format(request.method), err,
+                    status_code)
+            raise SharePointRequestError(
+                "SharePoint {0} request failed".format(request.method), err, status_code)
         except requests.exceptions.RequestException as err:
             raise SharePointRequestError(
                 "SharePoint {0} request failed".format(request.method), err)
 
+    def _count_request(self, response):
+        retries = getattr(response.raw, 'retries', None)
+        with self._stats_lock:
+            self.requests_sent += 1
+            if isinstance(retries, Retry):
+                self.retries += len(retries.history)
+
     @property
     def contextinfo(self):
         response = self._session.post(self.site_url + "/_api/contextinfo")
@@ -194,9 +314,134 @@ class SharepointApi(BaseSharepointApi):
 
         return self._send(request)
 
-    def get(self, url, **kwargs):
-        request = Request('GET', url, **kwargs)
-        return self._send(request)
+    def get(self, url, stream=False, **kwargs):
+        if stream:
+            # a streamed body can only be read once, so the response cannot be shared between callers
+            return self._send(Request('GET', url, **kwargs), stream=True)
+
+        key = ('GET', self._api_endpoint(url), repr(sorted(kwargs.items())))
+
+        return self._single_flight(key, lambda: self._send(Request('GET', url, **kwargs)))
+
+    def batch(self, batch_requests):
+        """Sends a list of requests.Request objects in as few $batch calls as possible (max_batch_size each).
+        Reads are sent as plain batch parts and each write in its own changeset, so one failed write does not
+        affect the others. Failed requests inside the batch are not raised, check BatchResponse.ok
+
+        :param batch_requests: list: requests.Request objects with relative or absolute urls
+
+        :returns: list: BatchResponse for each request, in the same order
+        """
+        responses = []
+        for i in range(0, len(batch_requests), self.max_batch_size):
+            responses.extend(self._send_batch(batch_requests[i:i + self.max_batch_size]))
+
+        return responses
+
+    def _send_batch(self, batch_requests):
+        batch_boundary = "batch_{0}".format(uuid.uuid4())
+        lines = []
+        for request in batch_requests:
+            lines.append("--" + batch_boundary)
+            if request.method == 'GET':
+                lines.extend(self._batch_part(request))
+                continue
+
+            changeset_boundary = "changeset_{0}".format(uuid.uuid4())
+            lines.extend([
+                "Content-Type: multipart/mixed; boundary={0}".format(changeset_boundary),
+                "",
+                "--" + changeset_boundary,
+            ])
+            lines.extend(self._batch_part(request))
+            lines.append("--{0}--".format(changeset_boundary))
+        lines.append("--{0}--".format(batch_boundary))
+
+        body = "\r\n".join(lines) + "\r\n"
+        headers = {'Content-Type': "multipart/mixed; boundary={0}".format(batch_boundary)}
+        response = self.post("_api/$batch", data=body.encode('utf-8'), headers=headers)
+
+        responses = self._parse_batch_response(response.text)
+        if len(responses) != len(batch_requests):
+            raise SharePointRequestError(
+                "SharePoint $batch returned {0} responses for {1} requests".format(
+                    len(responses), len(batch_requests)))
+
+        return responses
+
+    def _batch_part(self, request):
+        headers = {'Accept': 'application/json;odata=nometadata'}
+        if request.method in ('PATCH', 'MERGE', 'DELETE'):
+            headers['IF-MATCH'] = '*'
+
+        body = json.dumps(request.json) if request.json is not None else request.data
+        if body:
+            headers['Content-Type'] = "application/json;odata=verbose" if request.method == 'POST' \
+                else "application/json"
+
+        headers.update(request.headers or {})
+
+        lines = [
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            "{0} {1} HTTP/1.1".format(request.method, requests.utils.requote_uri(self._api_endpoint(request.url))),
+        ]
+        lines.extend("{0}: {1}".format(k, v) for k, v in headers.items())
+        lines.append("")
+        if body:
+            lines.append(body if isinstance(body, str) else body.decode('utf-8'))
+
+        return lines
+
+    @staticmethod
+    def _parse_batch_response(text):
+        """Splits a multipart $batch response into one BatchResponse per embedded HTTP response"""
+        responses = []
+        for part in re.split(r'^--[^\r\n]*\r?$', text, flags=re.MULTILINE):
+            match = re.search(r'^HTTP/1\.1 (\d{3})[^\n]*\n', part, flags=re.MULTILINE)
+            if not match:
+                continue
+
+            head, _, body = part[match.end():].replace('\r\n', '\n').partition('\n\n')
+            headers = {}
+            for line in head.split('\n'):
+                key, sep, value = line.partition(':')
+                if sep:
+                    headers[key.strip()] = value.strip()
+
+            responses.append(BatchResponse(int(match.group(1)), headers, body.strip()))
+
+        return responses
+
+    def _single_flight(self, key, send):
+        """Runs send() for the first caller with a given key. Callers arriving with the same key while that
+        request is still in flight wait for it and receive the same response (or error) instead of sending
+        their own. Only use this for idempotent requests
+        """
+
+        with self._inflight_lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = _InFlightRequest()
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.response
+
+        try:
+            inflight.response = send()
+            return inflight.response
+        except Exception as err:
+            inflight.error = err
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            inflight.event.set()
 
     def patch(self, url, data=None, json=None, **kwargs):
         request = Request(
@@ -0,0 +1,227 @@
+"""
+Command line entry point for bulk moves of list items between SharePoint and NDJSON or CSV files.
+
+    simple-sharepoint export "My List" --output items.ndjson --concurrency 4
+    simple-sharepoint import "My List" --input items.csv --format csv --batch-size 100
+
+Credentials are read from --site-url, --client-id and --client-secret or the SHAREPOINT_SITE_URL,
+SHAREPOINT_CLIENT_ID and SHAREPOINT_CLIENT_SECRET environment variables. Items are streamed, neither command
+holds the whole list in memory. Export keeps at most one page, or with --concurrency at most
+2 * concurrency ID ranges of --page-size items, and import at most 2 * concurrency batches
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .api import RateLimiter, SharepointApi
+from .errors import SharePointError
+from .site import Site
+from .sp_list import SpList
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="simple-sharepoint", description="Bulk export and import of SharePoint list items")
+    parser.add_argument("--site-url", default=os.environ.get("SHAREPOINT_SITE_URL"))
+    parser.add_argument("--client-id", default=os.environ.get("SHAREPOINT_CLIENT_ID"))
+    parser.add_argument("--client-secret", default=os.environ.get("SHAREPOINT_CLIENT_SECRET"))
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="maximum requests per second across all workers")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write list items to a file")
+    export_parser.add_argument("list_title")
+    export_parser.add_argument("--output", default="-", help="output file, - for stdout")
+    export_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export_parser.add_argument("--select", help="comma separated internal field names")
+    export_parser.add_argument("--filter", dest="query_filter", help="OData $filter")
+    export_parser.add_argument("--caml", dest="caml_query", help="CAML <Where> element, read with GetItems")
+    export_parser.add_argument("--page-size", type=int, default=5000,
+                               help="items per request, and with --concurrency the number of IDs per range")
+    export_parser.add_argument("--concurrency", type=int, default=1,
+                               help="read ID ranges in parallel, only without --filter and --caml. "
+                                    "At most 2 * concurrency ranges are buffered")
+
+    import_parser = subparsers.add_parser(
+        "import", help="add records without an Id and update records with one")
+    import_parser.add_argument("list_title")
+    import_parser.add_argument("--input", default="-", help="input file, - for stdin")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    import_parser.add_argument("--batch-size", type=int, default=100)
+    import_parser.add_argument("--concurrency", type=int, default=1)
+    import_parser.add_argument("--journal", help="SQLite journal path, makes the import resumable")
+    import_parser.add_argument("--job-id", help="journal job id, rerun with the same id to resume the job")
+    import_parser.add_argument("--client-key", help="field holding a unique key per new record, used with --journal")
+
+    args = parser.parse_args(argv)
+    if not (args.site_url and args.client_id and args.client_secret):
+        parser.error("--site-url, --client-id and --client-secret (or their environment variables) are required")
+    if args.command == "import" and args.journal and not args.job_id:
+        parser.error("--job-id is required with --journal")
+
+    return args
+
+
+def _connect(args):
+    sp = SharepointApi(args.site_url, args.client_id, args.client_secret)
+    if args.rate_limit:
+        sp.rate_limiter = RateLimiter(args.rate_limit)
+
+    return SpList(Site(sp), args.list_title)
+
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdout if mode == "w" else sys.stdin
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def _export(sp_list, args, output):
+    select = args.select.split(",") if args.select else None
+
+    if args.concurrency > 1 and not (args.query_filter or args.caml_query):
+        records = sp_list.get_list_records_parallel(
+            workers=args.concurrency, partition_size=args.page_size, select=select, row_limit=args.page_size)
+    else:
+        records = sp_list.iter_list_records(
+            row_limit=args.page_size, query_filter=args.query_filter, select=select, caml_query=args.caml_query)
+
+    count = 0
+    writer = None
+    for record in records:
+        if args.format == "ndjson":
+            output.write(json.dumps(record, default=str) + "\n")
+        else:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=select or list(record.keys()), extrasaction="ignore")
+                writer.writeheader()
+            # collections are written as JSON, import decodes them again
+            writer.writerow({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in record.items()})
+        count += 1
+
+    return count, 0
+
+
+def _read_records(source, file_format):
+    if file_format == "ndjson":
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    for row in csv.DictReader(source):
+        yield {k: _decode_csv_value(v) for k, v in row.items()}
+
+
+def _decode_csv_value(value):
+    """Reverses the CSV export, which writes collections (MultiChoice, multi value lookups) as JSON"""
+    if value == "":
+        return None
+
+    if value[:1] in ("[", "{"):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return value
+        if isinstance(decoded, (list, dict)):
+            return decoded
+
+    return value
+
+
+def _send_batch(sp_list, records):
+    responses = sp_list.save_records(records)
+    return [(record, response) for record, response in zip(records, responses)
+            if response is not None and not response.ok]
+
+
+def _import(sp_list, args, source):
+    count = 0
+    failures = 0
+    pending = set()
+
+    def replay_failed(entry, error):
+        nonlocal failures
+        failures += 1
+        print("failed: replayed {0} of item {1}: {2}: {3}".format(
+            entry.operation, entry.item_id, json.dumps(entry.payload, default=str), error), file=sys.stderr)
+
+    if args.journal:
+        sp_list.use_journal(args.journal, client_key_field=args.client_key, job_id=args.job_id)
+        sp_list.replay_journal(on_error=replay_failed)
+
+    def collect(done):
+        nonlocal failures
+        for future in done:
+            for record, response in future.result():
+                failures += 1
+                print("failed: {0}: {1} {2}".format(
+                    json.dumps(record, default=str), response.status_code, response.text), file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        batch = []
+        for record in _read_records(source, args.format):
+            batch.append(record)
+            count += 1
+            if len(batch) < args.batch_size:
+                continue
+
+            # keep a bounded number of batches in flight so the input is streamed
+            if len(pending) >= args.concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(_send_batch, sp_list, batch))
+            batch = []
+
+        if batch:
+            pending.add(executor.submit(_send_batch, sp_list, batch))
+
+        done, pending = wait(pending)
+        collect(done)
+
+    if sp_list.journal is not None:
+        sp_list.journal.close()
+
+    return count, failures
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    started = time.monotonic()
+
+    try:
+        sp_list = _connect(args)
+        if args.command == "export":
+            stream = _open(args.output, "w")
+            try:
+                count, failures = _export(sp_list, args, stream)
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+        else:
+            stream = _open(args.input, "r")
+            try:
+                count, failures = _import(sp_list, args, stream)
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+    except SharePointError as err:
+        print("error: {0}".format(err), file=sys.stderr)
+        return 1
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    sp = sp_list.site.sp
+    print("{0}ed {1} items in {2:.1f}s ({3:.1f} items/s), {4} requests, {5} retries, {6} failed".format(
+        args.command, count, elapsed, count / elapsed, sp.requests_sent, sp.retries, failures), file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Module for converting SharePoint JSON field values to python types and back. The converters for a list are
+picked once from its field schema (FieldTypeKind) and then applied to every value of that field
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from .field import FieldEnum
+
+
+# encode_verbose is used for odata=verbose payloads (new items), encode for plain json ones (updates)
+FieldCodec = namedtuple("FieldCodec", ["decode", "encode", "encode_verbose"])
+FieldCodec.__new__.__defaults__ = (None,)
+
+
+def _passthrough(value):
+    return value
+
+
+def _skip_none(func):
+    def wrapper(value):
+        return None if value is None else func(value)
+    return wrapper
+
+
+@_skip_none
+def _decode_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@_skip_none
+def _encode_datetime(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+            return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _decode_collection(value):
+    """Collections come back as a plain list with nometadata and as {"results": [...]} with verbose"""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return list(value.get("results", []))
+    return list(value)
+
+
+def _encode_collection(value):
+    return list(value or [])
+
+
+def _encode_verbose_collection(value):
+    return {"results": list(value or [])}
+
+
+@_skip_none
+def _decode_currency(value):
+    return Decimal(str(value))
+
+
+@_skip_none
+def _encode_number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+_CODECS = {
+    FieldEnum.Integer: FieldCodec(_skip_none(int), _passthrough),
+    FieldEnum.Counter: FieldCodec(_skip_none(int), _passthrough),
+    FieldEnum.Number: FieldCodec(_skip_none(float), _encode_number),
+    FieldEnum.Currency: FieldCodec(_decode_currency, _encode_number),
+    FieldEnum.Boolean: FieldCodec(_skip_none(bool), _passthrough),
+    FieldEnum.DateTime: FieldCodec(_decode_datetime, _encode_datetime),
+    FieldEnum.MultiChoice: FieldCodec(_decode_collection, _encode_collection, _encode_verbose_collection),
+}
+
+_LOOKUP_ID_CODEC = FieldCodec(_skip_none(int), _passthrough)
+_LOOKUP_MULTI_ID_CODEC = FieldCodec(
+    lambda value: [int(x) for x in _decode_collection(value)], _encode_collection, _encode_verbose_collection)
+
+
+class FieldCodecs():
+    """The value converters for one list schema, keyed by field internal name. Lookup and User fields are
+    registered under their <InternalName>Id name, which is where the referenced id (or ids) are returned.
+    Fields without a converter are passed through unchanged
+    """
+
+    def __init__(self, codecs):
+        self._codecs = codecs
+        self._decoders = {name: codec.decode for name, codec in codecs.items()}
+        self._encoders = {name: codec.encode for name, codec in codecs.items()}
+        self._verbose_encoders = {name: codec.encode_verbose or codec.encode for name, codec in codecs.items()}
+
+    @classmethod
+    def from_fields(cls, fields):
+        """Builds the converters from the records returned by SpList.fields"""
+        codecs = {}
+        for field in fields:
+            try:
+                field_enum = FieldEnum(field.get("FieldTypeKind"))
+            except ValueError:
+                continue
+
+            name = field.get("InternalName")
+            if field_enum in (FieldEnum.Lookup, FieldEnum.User):
+                multi = field.get("AllowMultipleValues") or field.get("TypeAsString", "").endswith("Multi")
+                codecs[name + "Id"] = _LOOKUP_MULTI_ID_CODEC if multi else _LOOKUP_ID_CODEC
+            elif field_enum in _CODECS:
+                codecs[name] = _CODECS[field_enum]
+
+        return cls(codecs)
+
+    def __contains__(self, name):
+        return name in self._codecs
+
+    def decode(self, name, value):
+        return self._decoders.get(name, _passthrough)(value)
+
+    def encode(self, name, value, verbose=False):
+        """Converts a value for upload. Collections are a plain list in json payloads and {"results": [...]}
+        in verbose ones, which is what new items are sent as
+        """
+        encoders = self._verbose_encoders if verbose else self._encoders
+        return encoders.get(name, _passthrough)(value)
+
+    def decode_record(self, record):
+        return {k: self.decode(k, v) for k, v in record.items()}
+
+    def encode_record(self, record, verbose=False):
+        return {k: self.encode(k, v, verbose) for k, v in record.items()}
+
+    def decode_page(self, records):
+        """Converts a whole page of records in place one field at a time, which avoids looking up the
+        converter for every value. Returns the records
+        """
+        if not records:
+            return records
+
+        names = set()
+        for record in records:
+            names.update(record.keys())
+
+        for name in names.intersection(self._decoders):
+            decode = self._decoders[name]
+            for record in records:
+                if name in record:
+                    record[name] = decode(record[name])
+
+        return records
@@ -7,7 +7,13 @@ class SharePointError(Exception):
 
 
 class SharePointRequestError(SharePointError):
+    def __init__(self, msg, details=None, status_code=None):
+        super().__init__(msg, details)
+        self.status_code = status_code
+
+
+class SharePointConcurrencyError(SharePointRequestError):
     pass
 
 class SharePointListItemError(SharePointError):
-    pass
\ No newline at end of file
+    pass
@@ -33,3 +33,53 @@ class FieldEnum(Enum):
     AllDayEvent = 29
     WorkflowEventType = 30
     MaxItems = 31
+
+
+class FieldSpec:
+    """
+    Describes a field a list should have, see SpList.ensure_fields. static_name
+    defaults to the title and is used to find the existing field
+    """
+
+    def __init__(self, title, field_enum, required=False, unique=False, static_name=None):
+        if not isinstance(field_enum, FieldEnum):
+            raise ValueError("field_enum must be a value in FieldEnum")
+
+        self.title = title
+        self.field_enum = field_enum
+        self.required = required
+        self.unique = unique
+        self.static_name = static_name
+
+    @classmethod
+    def from_dict(cls, spec_dict):
+        return cls(
+            spec_dict.get("title"),
+            spec_dict.get("field_enum"),
+            required=spec_dict.get("required", False),
+            unique=spec_dict.get("unique", False),
+            static_name=spec_dict.get("static_name"),
+        )
+
+    @property
+    def name(self):
+        return self.static_name or self.title
+
+    def to_sharepoint(self):
+        return {
+            "__metadata": {"type": "SP.Field"},
+            "Title": self.title,
+            "FieldTypeKind": self.field_enum.value,
+            "Required": self.required,
+            "EnforceUniqueValues": self.unique,
+            "StaticName": self.static_name,
+        }
+
+    def changes_from(self, field):
+        """Returns the properties of an existing SharePoint field record that differ from this spec"""
+        wanted = {
+            "FieldTypeKind": self.field_enum.value,
+            "Required": self.required,
+            "EnforceUniqueValues": self.unique,
+        }
+        return {k: v for k, v in wanted.items() if field.get(k) != v}
@@ -0,0 +1,159 @@
+"""
+Module for a durable journal of list item writes, so an interrupted bulk job can be rerun and only send the
+operations SharePoint has not acknowledged yet. The journal is a SQLite database file
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+
+
+JournalEntry = namedtuple(
+    "JournalEntry",
+    ["id", "list_title", "operation", "op_key", "item_id", "payload", "status", "result_id", "attempts", "etag",
+     "error"])
+
+_ENTRY_COLUMNS = "id, list_title, operation, op_key, item_id, payload, status, result_id, attempts, etag, error"
+
+
+class WriteJournal():
+    """Records every add, update and delete of a job before it is sent and marks it done once SharePoint
+    acknowledged it.
+
+    Entries belong to a job_id. Rerunning an interrupted job with the same job_id skips the operations that
+    job already completed, a new job_id starts from an empty journal. Within a job an operation is identified
+    by its operation, item id and payload (or the client key for adds, see SpList.use_journal) together with
+    how many identical operations the run sent before it, so writing the same value twice in one run sends it
+    twice. Operations that were started but never acknowledged are sent again, see SpList.replay_journal.
+    Operations SharePoint rejected for good, or that were started max_attempts times, are marked failed and
+    not sent again by the job
+    """
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    max_attempts = 3
+
+    def __init__(self, path, job_id):
+        if not job_id:
+            raise ValueError("job_id is required, reuse it to resume a job")
+
+        self.path = path
+        self.job_id = str(job_id)
+        self._occurrences = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS operations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                list_title TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                op_key TEXT NOT NULL,
+                item_id INTEGER,
+                payload TEXT,
+                status TEXT NOT NULL,
+                result_id INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                etag TEXT,
+                error TEXT,
+                UNIQUE (job_id, list_title, op_key)
+            )""")
+
+        # journals written before etag and error were recorded
+        columns = [x[1] for x in self._connection.execute("PRAGMA table_info(operations)")]
+        for column in ("etag", "error"):
+            if column not in columns:
+                self._connection.execute("ALTER TABLE operations ADD COLUMN {0} TEXT".format(column))
+        self._connection.commit()
+
+    def next_key(self, list_title, operation, item_id, payload, client_key=None):
+        """Returns the key of the next occurrence of an operation in this run. The n-th identical operation
+        of a run always gets the same key, which is what lets a rerun line up with the journal
+        """
+        if client_key is not None:
+            base_key = "{0}:key:{1}".format(operation, client_key)
+        else:
+            digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            base_key = "{0}:{1}:{2}".format(operation, item_id, digest)
+
+        with self._lock:
+            occurrence = self._occurrences.get((list_title, base_key), 0) + 1
+            self._occurrences[(list_title, base_key)] = occurrence
+
+        return "{0}:{1}".format(base_key, occurrence)
+
+    def begin(self, list_title, operation, op_key, item_id, payload, etag=None):
+        """Records an operation of this job as pending, or returns the existing entry if the job recorded it
+        before. attempts counts how many times the operation was started, including this one. etag is the
+        IF-MATCH value the operation is sent with, a replay sends it again
+
+        :returns: JournalEntry
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO operations "
+                "(job_id, list_title, operation, op_key, item_id, payload, status, etag) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.job_id, list_title, operation, op_key, item_id, json.dumps(payload, default=str),
+                 self.PENDING, etag))
+            self._connection.execute(
+                "UPDATE operations SET attempts = attempts + 1 "
+                "WHERE job_id = ? AND list_title = ? AND op_key = ? AND status = ?",
+                (self.job_id, list_title, op_key, self.PENDING))
+            self._connection.commit()
+
+            row = self._connection.execute(
+                "SELECT {0} FROM operations WHERE job_id = ? AND list_title = ? AND op_key = ?".format(
+                    _ENTRY_COLUMNS), (self.job_id, list_title, op_key)).fetchone()
+
+        return self._entry(row)
+
+    def complete(self, entry_id, result_id=None):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE operations SET status = ?, result_id = ? WHERE id = ?", (self.DONE, result_id, entry_id))
+            self._connection.commit()
+
+    def fail(self, entry_id, error):
+        """Marks an operation failed for good, the job does not send it again"""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE operations SET status = ?, error = ? WHERE id = ?", (self.FAILED, str(error), entry_id))
+            self._connection.commit()
+
+    def pending(self, list_title):
+        """Returns the operations of a list this job recorded but never got acknowledged, oldest first"""
+        return self._entries(list_title, self.PENDING)
+
+    def failed(self, list_title):
+        """Returns the operations of a list this job marked failed, oldest first"""
+        return self._entries(list_title, self.FAILED)
+
+    def _entries(self, list_title, status):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT {0} FROM operations WHERE job_id = ? AND list_title = ? AND status = ? ORDER BY id".format(
+                    _ENTRY_COLUMNS), (self.job_id, list_title, status)).fetchall()
+
+        return [self._entry(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _entry(row):
+        values = list(row)
+        values[5] = json.loads(values[5]) if values[5] is not None else None
+        return JournalEntry(*values)
@@ -73,22 +73,35 @@ class ListItem(object):
         self._attribute_map = None
         self.sp_list = None
         self.id = None
+        self.etag = None
+        self._codecs = None
         self._original_listitem = None
 
+    @staticmethod
+    def _etag_from_record(record):
+        if "odata.etag" in record:
+            return record["odata.etag"]
+        return record.get("__metadata", {}).get("etag")
+
     @classmethod
-    def from_sharepoint_record(cls, record, sp_list, attribute_map):
+    def from_sharepoint_record(cls, record, sp_list, attribute_map, codecs=None):
+        """Creates a ListItem from a SharePoint record. If codecs (see SpList.codecs) are passed, values
+        are converted to python types on the way in and back to SharePoint values by _to_upload_format
+        """
         list_item = cls()
         list_item.sp_list = sp_list
         list_item._attribute_map = attribute_map
+        list_item._codecs = codecs
         includes_id = False
         for x in list_item._attribute_map:
-            setattr(list_item, x.class_name, record.get(x.sharepoint_name))
+            setattr(list_item, x.class_name, list_item._decode(x.sharepoint_name, record.get(x.sharepoint_name)))
             if not includes_id and x.sharepoint_name.lower() == "id":
                 includes_id = True
 
         if not includes_id:
             list_item.id = record.get("Id")
 
+        list_item.etag = cls._etag_from_record(record)
         list_item._original_listitem = copy(list_item) if list_item.id else None
 
         return list_item
@@ -117,7 +130,10 @@ class ListItem(object):
 
     def update_from_sp_record(self, sp_record):
         for x in self._attribute_map:
-            setattr(self, x.class_name, sp_record.get(x.sharepoint_name))
+            setattr(self, x.class_name, self._decode(x.sharepoint_name, sp_record.get(x.sharepoint_name)))
+
+    def _decode(self, sharepoint_name, value):
+        return value if self._codecs is None else self._codecs.decode(sharepoint_name, value)
 
     def update_from_list_item(self, list_item):
         for x in self._attribute_map:
@@ -128,11 +144,41 @@ class ListItem(object):
         if hasattr(self, "id"):
             new_listitem.id = None
 
+        new_listitem.etag = None
         new_listitem._original_listitem = None
 
         return new_listitem
 
-    def save(self, force_save=False):
+    def refresh(self):
+        """Re-reads the item from SharePoint if it has changed on the server. The stored etag is sent as
+        If-None-Match, so an unchanged item costs a 304 response with no body and nothing is parsed
+
+        :returns: bool: True if the item was updated from SharePoint
+
+        :raises: SharePointListItemError
+        """
+        if self.sp_list is None or self.id is None:
+            raise SharePointListItemError(
+                "A SharePoint list and an id must be set in order to refresh a ListItem"
+            )
+
+        response = self.sp_list.get_list_item(self.id, etag=self.etag)
+        if response.status_code == 304:
+            return False
+
+        record = response.json()
+        self.update_from_sp_record(record)
+        self.etag = response.headers.get("ETag") or self._etag_from_record(record)
+        self._original_listitem = None
+        self._original_listitem = copy(self)
+
+        return True
+
+    def save(self, force_save=False, match_etag=False):
+        """Adds the item if it has no id, otherwise updates the changed (or with force_save, all) fields.
+        With match_etag the update is sent with IF-MATCH set to the stored etag instead of *, so it fails with
+        SharePointConcurrencyError if someone else changed the item since it was read
+        """
         if self.sp_list is None:
             raise SharePointListItemError(
                 "A SharePoint list must be set in order to save a ListItem"
@@ -148,12 +194,43 @@ class ListItem(object):
             json = self._to_upload_format("change")
 
         if json:
-            resp = self.sp_list.update_list_item(self.id, json)
+            if match_etag:
+                resp = self.sp_list.update_list_item(
+                    self.id, json, etag=self._etag_for_write())
+            else:
+                resp = self.sp_list.update_list_item(self.id, json)
+
+            # SharePoint returns the new etag of the item after a successful MERGE
+            # resp is None when the update was queued by SpList.enable_write_behind
+            new_etag = resp.headers.get("ETag") if resp is not None else None
+            if new_etag is not None:
+                self.etag = new_etag
 
             return resp
 
-    def delete(self):
-        self.sp_list.delete_list_item(self.id)
+    def delete(self, match_etag=False):
+        if match_etag:
+            self.sp_list.delete_list_item(self.id, etag=self._etag_for_write())
+        else:
+            self.sp_list.delete_list_item(self.id)
+
+    @property
+    def attachments(self):
+        """The attachment records of this item, see SpList.get_attachments"""
+        return self.sp_list.get_attachments([self.id])[self.id]
+
+    def download_attachments(self, directory):
+        return self.sp_list.download_attachments([self.id], directory).get(self.id, [])
+
+    def add_attachment(self, file, file_name=None):
+        return self.sp_list.add_attachment(self.id, file, file_name=file_name)
+
+    def _etag_for_write(self):
+        if self.etag is None:
+            raise SharePointListItemError(
+                "match_etag requires an etag, read the item with include_etag or call refresh() first"
+            )
+        return self.etag
 
     def _to_upload_format(self, record_type):
         """Creates a dictionary object based on the record_type: changes, new, all
@@ -188,6 +265,10 @@ class ListItem(object):
             for x in self._attribute_map:
                 record_dict[x.sharepoint_name] = getattr(self, x.class_name)
 
+        if self._codecs is not None:
+            # new items are posted as odata=verbose, updates as plain json
+            record_dict = self._codecs.encode_record(record_dict, verbose=record_type == "new")
+
         # if new then remove the Id field (new values don't have an Id), set the list_item_type in the metadata, and
         # set the Title field to the EID
         if record_type == "new":
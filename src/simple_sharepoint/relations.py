@@ -0,0 +1,106 @@
+"""
+Module for resolving Lookup and User field values of list records. Instead of one request per referenced id,
+the distinct ids of a whole page are fetched with one $batch call per target list and cached
+"""
+
+from requests import Request
+
+from .errors import SharePointRequestError
+from .field import FieldEnum
+
+
+class LookupResolver():
+    """Resolves the ids stored in <Field>Id of the given Lookup and User fields and attaches the referenced
+    record to <Field>, so an AttributeMap on the field name receives the referenced record (a list of records
+    for multi value fields). Resolved records are cached for the life of the resolver, reuse one resolver to
+    share the cache between reads
+
+    :param sp_list: SpList: list whose records are resolved
+    :param field_names: list: internal names of the Lookup or User fields to resolve
+    :param user_select: list: fields returned for users
+    """
+
+    # ids per $filter, keeps the request url well under the SharePoint url length limit
+    ids_per_request = 50
+
+    def __init__(self, sp_list, field_names, user_select=("Id", "Title", "EMail", "LoginName")):
+        self.sp_list = sp_list
+        self.user_select = list(user_select)
+        self._cache = {}
+
+        fields = {x.get("InternalName"): x for x in sp_list.fields}
+        self._targets = {}
+        for name in field_names:
+            field = fields.get(name)
+            if field is None:
+                raise ValueError("{0} is not a field of list {1}".format(name, sp_list.title))
+            self._targets[name] = self._target_for(field)
+
+    def _target_for(self, field):
+        multi = bool(field.get("AllowMultipleValues")) or field.get("TypeAsString", "").endswith("Multi")
+
+        if field.get("FieldTypeKind") == FieldEnum.User.value:
+            return ("_api/web/siteusers", tuple(self.user_select), multi)
+
+        if field.get("FieldTypeKind") == FieldEnum.Lookup.value:
+            list_id = field.get("LookupList", "").strip("{}")
+            select = ("Id", field.get("LookupField") or "Title")
+            return ("_api/web/lists(guid'{0}')/items".format(list_id), select, multi)
+
+        raise ValueError("{0} is not a Lookup or User field".format(field.get("InternalName")))
+
+    def resolve_page(self, records):
+        """Attaches the referenced records to a page of records in place and returns the page"""
+        wanted = {}
+        for name, (url, select, multi) in self._targets.items():
+            ids = wanted.setdefault((url, select), set())
+            for record in records:
+                ids.update(self._ids(record.get(name + "Id")))
+
+        for target, ids in wanted.items():
+            self._fetch(target, ids)
+
+        for name, (url, select, multi) in self._targets.items():
+            cache = self._cache.get((url, select), {})
+            for record in records:
+                ids = self._ids(record.get(name + "Id"))
+                resolved = [cache.get(x) for x in ids]
+                record[name] = resolved if multi else (resolved[0] if resolved else None)
+
+        return records
+
+    def _fetch(self, target, ids):
+        cache = self._cache.setdefault(target, {})
+        missing = sorted(x for x in ids if x not in cache)
+        if not missing:
+            return
+
+        url, select = target
+        batch_requests = []
+        for i in range(0, len(missing), self.ids_per_request):
+            chunk = missing[i:i + self.ids_per_request]
+            query_filter = " or ".join("Id eq {0}".format(x) for x in chunk)
+            batch_requests.append(Request("GET", "{0}?$select={1}&$filter={2}&$top={3}".format(
+                url, ",".join(select), query_filter, len(chunk))))
+
+        for response in self.sp_list.site.sp.batch(batch_requests):
+            if not response.ok:
+                raise SharePointRequestError(
+                    "SharePoint lookup request failed", "{0} {1}".format(response.status_code, response.text))
+
+            for record in response.json().get("value", []):
+                cache[record.get("Id")] = record
+
+        # ids that no longer exist are cached as None so they are not requested again
+        for x in missing:
+            cache.setdefault(x, None)
+
+    @staticmethod
+    def _ids(value):
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            value = value.get("results", [])
+        if isinstance(value, (list, tuple)):
+            return [x for x in value if x is not None]
+        return [value]
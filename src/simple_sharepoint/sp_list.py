@@ -1,9 +1,28 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import quote
+
+from requests import Request
+
+
+# keys of item records that cannot be written but are not flagged read-only in the field schema
+_SYSTEM_KEYS = frozenset([
+    "Id", "ID", "FileSystemObjectType", "ServerRedirectedEmbedUri", "ServerRedirectedEmbedUrl", "Attachments"])
+
+
 class SpList():
     def __init__(self, site, title):
         self.site = site
         self.title = title
         self.base_url = "_api/web/lists/GetByTitle('{0}')".format(self.title)
         self.item_type = self.list_details["ListItemEntityTypeFullName"]
+        self.write_behind = None
+        self.journal = None
+        self.journal_client_key = None
+        self._codecs = None
+        self._read_only_fields = None
 
     @property
     def fields(self):
@@ -12,41 +31,446 @@ class SpList():
 
         return response.json().get('value')
 
+    @property
+    def codecs(self):
+        """Value converters for the fields of this list, built from the field schema on first use"""
+        if self._codecs is None:
+            from .codec import FieldCodecs
+
+            self._codecs = FieldCodecs.from_fields(self.fields)
+
+        return self._codecs
+
+    @property
+    def read_only_fields(self):
+        """Names under which the read-only and hidden fields of this list appear in item records, built from
+        the field schema on first use. Lookup and User fields are included with their <InternalName>Id name
+        """
+        if self._read_only_fields is None:
+            from .field import FieldEnum
+
+            names = set()
+            for field in self.fields:
+                if not (field.get("ReadOnlyField") or field.get("Hidden")):
+                    continue
+
+                name = field.get("InternalName")
+                # records return names starting with an underscore with an OData_ prefix
+                names.update([name, "OData_" + name] if name.startswith("_") else [name])
+                if field.get("FieldTypeKind") in (FieldEnum.Lookup.value, FieldEnum.User.value):
+                    names.add(name + "Id")
+
+            self._read_only_fields = frozenset(names)
+
+        return self._read_only_fields
+
     @property
     def list_details(self):
         return self.site.sp.get(self.base_url).json()
 
     def add_list_item(self,  json):
-        url = self.base_url + "/items"
-        response = self.site.sp.post(url, json=json)
+        response = self._journaled("add", None, json)
+
+        return response
+
+    def get_attachments(self, list_item_ids):
+        """Lists the attachments of many items with batched AttachmentFiles requests
+
+        :param list_item_ids: list: item ids
+
+        :returns: dict: item id to a list of attachment records (FileName, ServerRelativeUrl)
+
+        :raises: SharePointRequestError
+        """
+        from .errors import SharePointRequestError
+
+        list_item_ids = list(list_item_ids)
+        batch_requests = [Request('GET', self.base_url + "/items({0})/AttachmentFiles".format(x))
+                          for x in list_item_ids]
+
+        attachments = {}
+        for list_item_id, response in zip(list_item_ids, self.site.sp.batch(batch_requests)):
+            if not response.ok:
+                raise SharePointRequestError(
+                    "SharePoint attachment listing of item {0} failed".format(list_item_id),
+                    "{0} {1}".format(response.status_code, response.text))
+            attachments[list_item_id] = response.json().get('value', [])
+
+        return attachments
+
+    def download_attachment(self, attachment, path, chunk_size=1024 * 1024):
+        """Streams one attachment record (as returned by get_attachments) to path without holding the file
+        in memory. The file is written next to path first and renamed when complete
+        """
+        url = "_api/web/GetFileByServerRelativeUrl('{0}')/$value".format(
+            quote(attachment['ServerRelativeUrl'].replace("'", "''")))
+
+        response = self.site.sp.get(url, stream=True)
+        partial_path = path + ".partial"
+        try:
+            with open(partial_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        finally:
+            response.close()
+
+        os.replace(partial_path, path)
+        return path
+
+    def download_attachments(self, list_item_ids, directory, workers=4):
+        """Downloads the attachments of many items to directory/<item id>/<file name>. Attachments are listed
+        in batches and downloaded concurrently
+
+        :returns: dict: item id to the list of downloaded file paths
+        """
+        attachments = self.get_attachments(list_item_ids)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for list_item_id, records in attachments.items():
+                item_directory = os.path.join(directory, str(list_item_id))
+                os.makedirs(item_directory, exist_ok=True)
+                futures[list_item_id] = [
+                    executor.submit(self.download_attachment, x, os.path.join(item_directory, x['FileName']))
+                    for x in records
+                ]
+
+            return {k: [x.result() for x in v] for k, v in futures.items()}
+
+    def add_attachment(self, list_item_id, file, file_name=None):
+        """Uploads a file path or binary file object as an attachment of an item. The file is streamed from
+        disk rather than read into memory
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as f:
+                return self.add_attachment(list_item_id, f, file_name or os.path.basename(file))
+
+        if file_name is None:
+            file_name = os.path.basename(getattr(file, 'name', ''))
+        if not file_name:
+            raise ValueError("file_name is required for file objects without a name")
+
+        url = self.base_url + "/items({0})/AttachmentFiles/add(FileName='{1}')".format(
+            list_item_id, quote(file_name.replace("'", "''")))
+        response = self.site.sp.post(url, data=file, headers={'Content-Type': 'application/octet-stream'})
 
         return response
 
+    def add_attachments(self, uploads, workers=4):
+        """Uploads several attachments to several items. Files of the same item are uploaded one after the
+        other, since parallel uploads to one item conflict, and different items are uploaded concurrently
+
+        :param uploads: dict: item id to a list of file paths
+
+        :returns: dict: item id to the list of responses
+        """
+        def upload(list_item_id, paths):
+            return [self.add_attachment(list_item_id, x) for x in paths]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {k: executor.submit(upload, k, v) for k, v in uploads.items()}
+
+            return {k: v.result() for k, v in futures.items()}
+
     def create_field(self, field_name, field_enum, required=False, unique=False, static_name=None):
-        from .field import FieldEnum
+        from .field import FieldEnum, FieldSpec
 
         if field_enum.value not in FieldEnum._value2member_map_:
             raise ValueError("field_enum must be a value in FieldEnum")
 
         url = self.base_url + "/Fields"
 
-        update_data = {}
-        update_data['__metadata'] = {'type': 'SP.Field'} #.format(field_enum.name)}
-        update_data['Title'] = field_name
-        update_data['FieldTypeKind'] = field_enum.value
-        update_data['Required'] = required
-        update_data['EnforceUniqueValues'] = unique
-        update_data['StaticName'] = static_name
+        update_data = FieldSpec(field_name, field_enum, required, unique, static_name).to_sharepoint()
 
         response = self.site.sp.post(url, json=update_data)
+        self._codecs = None
+        self._read_only_fields = None
         return response
 
-    def delete_list_item(self, list_item_id):
+    def ensure_fields(self, specs):
+        """Makes sure the list has the fields described by specs (FieldSpec objects or dicts for
+        FieldSpec.from_dict). The schema is read once, and only missing fields are created and fields whose
+        type, Required or EnforceUniqueValues differ are updated, all in a single $batch call
+
+        :returns: dict: field name to "created", "updated" or "unchanged"
+
+        :raises: SharePointRequestError
+        """
+        from .errors import SharePointRequestError
+        from .field import FieldSpec
+
+        specs = [x if isinstance(x, FieldSpec) else FieldSpec.from_dict(x) for x in specs]
+
+        existing = {}
+        for field in self.fields:
+            existing.setdefault(field.get("InternalName"), field)
+            existing.setdefault(field.get("Title"), field)
+
+        results = {}
+        batch_requests = []
+        for spec in specs:
+            field = existing.get(spec.name) or existing.get(spec.title)
+            if field is None:
+                results[spec.name] = "created"
+                batch_requests.append(Request('POST', self.base_url + "/Fields", json=spec.to_sharepoint()))
+                continue
+
+            changes = spec.changes_from(field)
+            if not changes:
+                results[spec.name] = "unchanged"
+                continue
+
+            results[spec.name] = "updated"
+            changes["__metadata"] = {"type": "SP.Field"}
+            url = self.base_url + "/Fields('{0}')".format(field.get("Id"))
+            batch_requests.append(Request('POST', url, json=changes,
+                                          headers={'X-HTTP-Method': 'MERGE', 'IF-MATCH': '*'}))
+
+        if not batch_requests:
+            return results
+
+        # the schema changed, so converters built from the old one are stale
+        self._codecs = None
+        self._read_only_fields = None
+        responses = self.site.sp.batch(batch_requests)
+
+        failed = [x for x in responses if not x.ok]
+        if failed:
+            raise SharePointRequestError(
+                "{0} of {1} field changes failed".format(len(failed), len(responses)),
+                "; ".join("{0} {1}".format(x.status_code, x.text) for x in failed))
+
+        return results
+
+    def delete_list_item(self, list_item_id, etag=None):
+        response = self._journaled("delete", list_item_id, None, etag)
+
+        return response
+
+    def enable_write_behind(self, max_items=100, max_delay=5.0, on_error=None):
+        """Queues item updates instead of sending them immediately. update_list_item (and so ListItem.save on
+        existing items) merges updates per item id and a background thread sends them in $batch calls.
+        Adds, deletes and updates with an etag are still sent immediately. Call flush() or close() to make
+        sure everything has been written
+
+        :returns: WriteBehindQueue
+        """
+        from .write_behind import WriteBehindQueue
+
+        if self.write_behind is None:
+            self.write_behind = WriteBehindQueue(
+                self, max_items=max_items, max_delay=max_delay, on_error=on_error)
+
+        return self.write_behind
+
+    def flush(self):
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def close(self):
+        """Flushes and stops the write-behind queue, later updates are sent immediately again"""
+        if self.write_behind is not None:
+            write_behind, self.write_behind = self.write_behind, None
+            write_behind.close()
+
+    def save_records(self, records):
+        """Adds the records without an Id (or ID) and updates the ones with one, all in one $batch call. When a
+        journal is in use every record is journaled before the batch is sent and marked done from its own
+        response, and records the job already completed are not sent.
+
+        Read-only and hidden fields and system properties such as Created or GUID are left out of the
+        payloads, so records read from a list can be saved as they are
+
+        :param records: list: dicts of internal field names to values
+
+        :returns: list: BatchResponse for each record, None for records skipped by the journal
+        """
+        read_only = self.read_only_fields
+
+        operations = []
+        for record in records:
+            list_item_id = record.get("ID") or record.get("Id")
+            payload = {k: v for k, v in record.items()
+                       if k not in read_only and k not in _SYSTEM_KEYS and not k.startswith("odata.")}
+
+            if list_item_id:
+                operations.append(("update", int(list_item_id), payload))
+            else:
+                # adds are sent as odata=verbose, where collections must be {"results": [...]}
+                payload = self.codecs.encode_record(payload, verbose=True)
+                payload["__metadata"] = {"type": self.item_type}
+                operations.append(("add", None, payload))
+
+        entries = [None] * len(operations)
+        if self.journal is not None:
+            entries = [self._journal_begin(*x) for x in operations]
+
+        to_send = [i for i, x in enumerate(operations) if self.journal is None or entries[i] is not None]
+        batch_requests = []
+        for i in to_send:
+            operation, list_item_id, payload = operations[i]
+            if operation == "update":
+                batch_requests.append(
+                    Request('PATCH', self.base_url + "/items({0})".format(list_item_id), json=payload))
+            else:
+                batch_requests.append(Request('POST', self.base_url + "/items", json=payload))
+
+        results = [None] * len(operations)
+        if not batch_requests:
+            return results
+
+        for i, response in zip(to_send, self.site.sp.batch(batch_requests)):
+            results[i] = response
+            if entries[i] is None:
+                continue
+            if response.ok:
+                self._journal_complete(entries[i], response)
+            else:
+                self._journal_failed(entries[i], response.status_code,
+                                     "{0} {1}".format(response.status_code, response.text))
+
+        return results
+
+    def use_journal(self, journal, client_key_field=None, job_id=None):
+        """Records adds, updates and deletes in a WriteJournal (or a journal at the given SQLite path for
+        job_id) before sending them and marks them done once SharePoint acknowledges them. Rerunning an
+        interrupted job with the same job_id then skips every operation that job already completed, a new
+        job_id writes everything again.
+
+        client_key_field is the internal name of a field holding a unique key set by the caller on new items.
+        Adds are then journaled by that key, and an add that was sent but never acknowledged is looked up on
+        the server by its key before being sent again, so it is not created twice. Updates queued by
+        enable_write_behind are not journaled
+
+        :returns: WriteJournal
+        """
+        from .journal import WriteJournal
+
+        self.journal = journal if isinstance(journal, WriteJournal) else WriteJournal(journal, job_id)
+        self.journal_client_key = client_key_field
+
+        return self.journal
+
+    def replay_journal(self, on_error=None):
+        """Sends the journaled operations of this job and list that were never acknowledged, with the etag
+        they were first sent with. They keep their journal entry, so when the job is rerun afterwards they are
+        skipped like any completed operation.
+
+        A failing operation does not stop the replay. If on_error is given it is called as
+        on_error(entry, error) for it. Operations SharePoint rejected with a client error, or started
+        WriteJournal.max_attempts times, are marked failed, the others stay pending for the next replay. A
+        replayed delete of an item that no longer exists is done, the first attempt deleted it
+
+        :returns: int: number of operations replayed
+        """
+        from .errors import SharePointRequestError
+
+        if self.journal is None:
+            raise ValueError("use_journal must be called before replay_journal")
+
+        replayed = 0
+        for pending in self.journal.pending(self.title):
+            entry = self._journal_begin(
+                pending.operation, pending.item_id, pending.payload, pending.op_key, pending.etag)
+            if entry is None:
+                replayed += 1
+                continue
+
+            try:
+                response = self._send_operation(entry.operation, entry.item_id, entry.payload, entry.etag)
+            except SharePointRequestError as err:
+                if entry.operation == "delete" and err.status_code == 404:
+                    self.journal.complete(entry.id, entry.item_id)
+                    replayed += 1
+                    continue
+
+                self._journal_failed(entry, err.status_code, err)
+                if on_error:
+                    on_error(entry, err)
+                continue
+
+            self._journal_complete(entry, response)
+            replayed += 1
+
+        return replayed
+
+    def _send_operation(self, operation, list_item_id, json, etag=None):
+        if operation == "add":
+            return self.site.sp.post(self.base_url + "/items", json=json)
+
         url = self.base_url + "/items({0})".format(list_item_id)
-        response = self.site.sp.delete(url)
+        headers = {'IF-MATCH': etag} if etag else None
+        if operation == "update":
+            return self.site.sp.patch(url, json=json, headers=headers)
+
+        return self.site.sp.delete(url, headers=headers)
+
+    def _journaled(self, operation, list_item_id, json, etag=None):
+        from .errors import SharePointRequestError
+
+        if self.journal is None:
+            return self._send_operation(operation, list_item_id, json, etag)
+
+        entry = self._journal_begin(operation, list_item_id, json, etag=etag)
+        if entry is None:
+            return None
+
+        try:
+            response = self._send_operation(operation, list_item_id, json, etag)
+        except SharePointRequestError as err:
+            self._journal_failed(entry, err.status_code, err)
+            raise
+        self._journal_complete(entry, response)
 
         return response
 
+    def _journal_begin(self, operation, list_item_id, json, op_key=None, etag=None):
+        """Records an operation in the journal and returns its entry, or None if it must not be sent because
+        this job already completed it or gave up on it
+        """
+        from .journal import WriteJournal
+
+        client_key = None
+        if operation == "add" and self.journal_client_key:
+            client_key = json.get(self.journal_client_key)
+
+        if op_key is None:
+            op_key = self.journal.next_key(self.title, operation, list_item_id, json, client_key)
+
+        entry = self.journal.begin(self.title, operation, op_key, list_item_id, json, etag)
+        if entry.status in (WriteJournal.DONE, WriteJournal.FAILED):
+            return None
+
+        # an add that was started before may have reached SharePoint without being acknowledged
+        if client_key is not None and entry.attempts > 1:
+            existing_id = self._find_item_id(self.journal_client_key, client_key)
+            if existing_id is not None:
+                self.journal.complete(entry.id, existing_id)
+                return None
+
+        return entry
+
+    def _journal_complete(self, entry, response):
+        result_id = response.json().get("Id") if entry.operation == "add" else entry.item_id
+        self.journal.complete(entry.id, result_id)
+
+    def _journal_failed(self, entry, status_code, error):
+        """Marks an entry failed when sending it again cannot help, a client error other than a timeout or
+        throttling, or too many attempts. Otherwise it stays pending for replay_journal
+        """
+        client_error = status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429)
+        if client_error or entry.attempts >= self.journal.max_attempts:
+            self.journal.fail(entry.id, error)
+
+    def _find_item_id(self, field_name, value):
+        if isinstance(value, str):
+            value = "'{0}'".format(value.replace("'", "''"))
+
+        url = self.base_url + "/items?$select=Id&$top=1&$filter={0} eq {1}".format(field_name, value)
+        records = self.site.sp.get(url).json().get('value')
+
+        return records[0]['Id'] if records else None
+
     def get_field(self, field_title):
         url = self.base_url + "/fields/GetByTitle('{0}')".format(field_title)
 
@@ -54,15 +478,228 @@ class SpList():
 
         return response.json().get('value')
 
-    def get_list_records(self, row_limit=5000):
+    def get_list_item(self, list_item_id, etag=None):
+        """Gets a single item with minimal metadata so the response carries its etag. If an etag is passed
+        SharePoint answers 304 Not Modified with no body when the item has not changed
+        """
+        url = self.base_url + "/items({0})".format(list_item_id)
+        headers = {'Accept': 'application/json;odata=minimalmetadata'}
+        if etag:
+            headers['If-None-Match'] = etag
+
+        response = self.site.sp.get(url, headers=headers)
+
+        return response
+
+    def get_list_records(self, row_limit=5000, include_etag=False):
         url = self.base_url + "/items?$top={0}".format(row_limit)
 
-        response = self.site.sp.get(url)
+        # odata.etag is only returned with minimal metadata
+        headers = {'Accept': 'application/json;odata=minimalmetadata'} if include_etag else None
+        response = self.site.sp.get(url, headers=headers)
 
         return response.json().get('value')
 
-    def update_list_item(self, list_item_id, json):
-        url = self.base_url + "/items({0})".format(list_item_id)
-        response = self.site.sp.patch(url, json=json)
+    def iter_list_records(self, row_limit=5000, query_filter=None, select=None, orderby=None,
+                          include_etag=False, expand=None, caml_query=None):
+        """Yields every record matching the query, following the odata.nextLink continuation a page
+        (row_limit records) at a time so the whole list is never held in memory
+        """
+        for page in self.iter_list_pages(row_limit=row_limit, query_filter=query_filter, select=select,
+                                         orderby=orderby, include_etag=include_etag, expand=expand,
+                                         caml_query=caml_query):
+            yield from page
+
+    def iter_list_pages(self, row_limit=5000, query_filter=None, select=None, orderby=None,
+                        include_etag=False, expand=None, caml_query=None):
+        """Yields the records matching the query one page (a list of up to row_limit records) at a time
+
+        :param expand: dict: Lookup or User field internal name to the list of fields of the referenced
+            record to return with it in the same request, e.g. {"Author": ["Title", "EMail"]}
+        :param caml_query: str: CAML <Where> element. When given the records are read with GetItems
+            instead of the items endpoint, see iter_caml_pages
+        """
+        if caml_query is not None:
+            if query_filter or orderby or expand:
+                raise ValueError("query_filter, orderby and expand cannot be combined with caml_query")
+            yield from self.iter_caml_pages(caml_query, row_limit=row_limit, select=select,
+                                            include_etag=include_etag)
+            return
+
+        select = list(select) if select else []
+        if expand and not select:
+            select.append("*")
+        for name, fields in (expand or {}).items():
+            select.extend("{0}/{1}".format(name, x) for x in fields)
+
+        query = ["$top={0}".format(row_limit)]
+        if query_filter:
+            query.append("$filter={0}".format(query_filter))
+        if select:
+            query.append("$select={0}".format(",".join(select)))
+        if expand:
+            query.append("$expand={0}".format(",".join(expand)))
+        if orderby:
+            query.append("$orderby={0}".format(orderby))
+
+        url = self.base_url + "/items?" + "&".join(query)
+        headers = {'Accept': 'application/json;odata=minimalmetadata'} if include_etag else None
+
+        while url:
+            data = self.site.sp.get(url, headers=headers).json()
+            yield data.get('value', [])
+            url = data.get('odata.nextLink')
+
+    def iter_caml_pages(self, caml_query, row_limit=5000, select=None, include_etag=False):
+        """Yields the records matching a CAML <Where> element one page at a time using GetItems. Pages are
+        read in ID order and each request continues after the last ID of the previous page through
+        ListItemCollectionPosition, which lets filtered reads on lists above the list view threshold run on
+        the server. The records have the same shape as the ones returned by iter_list_pages
+        """
+        view_fields = ""
+        if select:
+            view_fields = "<ViewFields>{0}</ViewFields>".format(
+                "".join("<FieldRef Name='{0}'/>".format(x) for x in select))
+
+        view_xml = ("<View Scope='RecursiveAll'><Query>{0}<OrderBy><FieldRef Name='ID' Ascending='TRUE'/>"
+                    "</OrderBy></Query>{1}<RowLimit Paged='TRUE'>{2}</RowLimit></View>").format(
+                        caml_query, view_fields, row_limit)
+
+        url = self.base_url + "/GetItems"
+        headers = {'Accept': 'application/json;odata=minimalmetadata'} if include_etag else None
+        last_id = None
+
+        while True:
+            query = {"__metadata": {"type": "SP.CamlQuery"}, "ViewXml": view_xml}
+            if last_id is not None:
+                query["ListItemCollectionPosition"] = {
+                    "__metadata": {"type": "SP.ListItemCollectionPosition"},
+                    "PagingInfo": "Paged=TRUE&p_ID={0}".format(last_id),
+                }
+
+            page = self.site.sp.post(url, json={"query": query}, headers=headers).json().get('value', [])
+            if page:
+                yield page
+
+            if len(page) < row_limit:
+                return
+
+            last_id = page[-1].get("Id", page[-1].get("ID"))
+
+    def iter_list_items(self, attribute_map, list_item_class=None, typed=False, resolve=None, **kwargs):
+        """Yields a ListItem (or list_item_class) for every record returned by iter_list_pages, which
+        receives the remaining keyword arguments. With typed=True values are converted using codecs.
+
+        resolve is a list of Lookup or User field names, or a LookupResolver to share its cache between
+        reads. The referenced records of each page are fetched together and attached under the field name,
+        so they can be mapped with an AttributeMap on that name
+        """
+        from .listitem import ListItem
+        from .relations import LookupResolver
+
+        list_item_class = list_item_class or ListItem
+        codecs = self.codecs if typed else None
+        if resolve is not None and not isinstance(resolve, LookupResolver):
+            resolve = LookupResolver(self, resolve)
+
+        for page in self.iter_list_pages(**kwargs):
+            if resolve is not None:
+                resolve.resolve_page(page)
+            for record in page:
+                yield list_item_class.from_sharepoint_record(record, self, attribute_map, codecs=codecs)
+
+    def get_list_records_parallel(self, workers=4, partition_size=5000, select=None, ordered=True,
+                                  use_processes=False, row_limit=5000):
+        """Yields every record in the list by splitting it into ID ranges of partition_size and reading the
+        ranges concurrently. Each range is a filter on the indexed ID column, so the reads stay under the
+        list view threshold. Records are plain dicts, which keeps them cheap to pass back from worker processes
+
+        :param workers: int: number of threads or processes reading partitions
+        :param partition_size: int: number of IDs covered by each partition
+        :param select: list: internal field names to return, all fields when None
+        :param ordered: bool: yield records in ID order, otherwise in the order partitions complete
+        :param use_processes: bool: read partitions in a process pool, each process opens its own connection
+        :param row_limit: int: page size used within each partition
+
+        :returns: generator of dict
+        """
+        max_id = self._max_item_id()
+        if not max_id:
+            return
+
+        partitions = iter(range(1, max_id + 1, partition_size))
+
+        if use_processes:
+            sp = self.site.sp
+            credentials = (sp.site_url, sp.client_id, sp.client_secret)
+            executor = ProcessPoolExecutor(max_workers=workers)
+
+            def submit(start):
+                return executor.submit(_fetch_partition_in_process, credentials, self.title, start,
+                                       start + partition_size, select, row_limit)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+            def submit(start):
+                return executor.submit(self._fetch_partition, start, start + partition_size, select, row_limit)
+
+        # only window partitions are read ahead of the consumer, so at most that many are held in memory
+        window = workers * 2
+        pending = deque(submit(start) for start in islice(partitions, window))
+
+        try:
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+
+                records = future.result()
+                future = None
+
+                for start in islice(partitions, 1):
+                    pending.append(submit(start))
+
+                yield from records
+                records = None
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _fetch_partition(self, start, stop, select=None, row_limit=5000):
+        query_filter = "ID ge {0} and ID lt {1}".format(start, stop)
+        return list(self.iter_list_records(row_limit=row_limit, query_filter=query_filter, select=select,
+                                           orderby="ID"))
+
+    def _max_item_id(self):
+        url = self.base_url + "/items?$select=ID&$orderby=ID desc&$top=1"
+        records = self.site.sp.get(url).json().get('value')
+
+        return records[0]['ID'] if records else 0
+
+    def update_list_item(self, list_item_id, json, etag=None):
+        if self.write_behind is not None and not etag:
+            self.write_behind.enqueue(list_item_id, json)
+            return None
+
+        response = self._journaled("update", list_item_id, json, etag)
 
         return response
+
+
+# one SpList per worker process, created on the first partition the process reads
+_process_lists = {}
+
+
+def _fetch_partition_in_process(credentials, title, start, stop, select, row_limit):
+    from .api import SharepointApi
+    from .site import Site
+
+    key = (credentials, title)
+    if key not in _process_lists:
+        _process_lists[key] = SpList(Site(SharepointApi(*credentials)), title)
+
+    return _process_lists[key]._fetch_partition(start, stop, select, row_limit)
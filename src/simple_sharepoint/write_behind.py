@@ -0,0 +1,146 @@
+"""
+Module for deferred list item updates. Updates to the same item are merged in memory and sent to SharePoint
+together in $batch calls from a background thread
+"""
+
+import threading
+import time
+
+from requests import Request
+
+from .errors import SharePointListItemError, SharePointRequestError
+
+
+class WriteBehindQueue():
+    """Collects list item updates for an SpList and sends them in batches. Repeated updates to the same item id
+    are merged into one payload, later values winning. The queue is flushed when it holds max_items items, when
+    the oldest pending update is max_delay seconds old, or when flush() or close() is called.
+
+    If on_error is given it is called as on_error(item_id, payload, error) for every update that failed,
+    otherwise the failures are raised as a SharePointRequestError by the next flush() or close(). If on_error
+    itself raises, the update error and the callback error are both raised by the next flush() or close()
+    """
+
+    def __init__(self, sp_list, max_items=100, max_delay=5.0, on_error=None):
+        self.sp_list = sp_list
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.on_error = on_error
+
+        self._pending = {}
+        self._oldest = None
+        self._errors = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name="WriteBehindQueue", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, list_item_id, json):
+        with self._condition:
+            if self._closed:
+                raise SharePointListItemError("Cannot enqueue updates on a closed WriteBehindQueue")
+
+            self._pending.setdefault(list_item_id, {}).update(json)
+            if self._oldest is None:
+                # wake the flusher so it starts waiting for max_delay
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            elif len(self._pending) >= self.max_items:
+                self._condition.notify()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self):
+        """Sends all pending updates and waits for them to finish
+
+        :raises: SharePointRequestError
+        """
+        self._send_pending()
+        self._raise_errors()
+
+    def close(self):
+        """Stops the background thread and flushes the remaining updates"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._due():
+                    timeout = None if self._oldest is None else \
+                        max(self._oldest + self.max_delay - time.monotonic(), 0)
+                    self._condition.wait(timeout)
+
+                if self._closed:
+                    return
+
+            self._send_pending()
+
+    def _due(self):
+        if not self._pending:
+            return False
+
+        return len(self._pending) >= self.max_items or time.monotonic() >= self._oldest + self.max_delay
+
+    def _send_pending(self):
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending, self._oldest = self._pending, {}, None
+
+            if not pending:
+                return
+
+            updates = list(pending.items())
+            batch_requests = [
+                Request('PATCH', self.sp_list.base_url + "/items({0})".format(list_item_id), json=json)
+                for list_item_id, json in updates
+            ]
+
+            try:
+                responses = self.sp_list.site.sp.batch(batch_requests)
+            except Exception as err:
+                for list_item_id, json in updates:
+                    self._failed(list_item_id, json, err)
+                return
+
+            for (list_item_id, json), response in zip(updates, responses):
+                if not response.ok:
+                    self._failed(list_item_id, json, SharePointRequestError(
+                        "SharePoint update of item {0} failed".format(list_item_id),
+                        "{0} {1}".format(response.status_code, response.text)))
+
+    def _failed(self, list_item_id, json, error):
+        errors = [(list_item_id, error)]
+        if self.on_error:
+            try:
+                self.on_error(list_item_id, json, error)
+                return
+            except Exception as callback_error:
+                # the flusher thread must keep running, the next flush raises both errors instead
+                errors.append((list_item_id, callback_error))
+
+        with self._condition:
+            self._errors.extend(errors)
+
+    def _raise_errors(self):
+        with self._condition:
+            errors, self._errors = self._errors, []
+
+        if errors:
+            raise SharePointRequestError(
+                "{0} queued updates failed".format(len(errors)),
+                "; ".join(str(error) for _, error in errors))
@@ -1,5 +1,8 @@
 from src.simple_sharepoint.api import SharepointApi
+from requests import Request
 import responses
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import call, patch
@@ -63,6 +66,92 @@ class TestApi(unittest.TestCase):
         self.assertEqual(short_url, "_api/site")
         self.assertEqual(full_url, "https://{0}/_api/site".format(site_url))
 
+    @patch("src.simple_sharepoint.api.requests.get")
+    def test_concurrent_identical_gets_share_one_request(self, req_get):
+        api = SharepointApi(site_url, client_id, client_secret)
+        sent = []
+
+        def slow_send(request):
+            sent.append(request.url)
+            time.sleep(0.1)
+            return request.url
+
+        with patch.object(api, "_send", side_effect=slow_send):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(api.get("_api/web")))
+                       for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(len(sent), 1)
+            self.assertEqual(results, ["_api/web"] * 8)
+
+            # once the first request finished a new one is sent
+            api.get("_api/web")
+            self.assertEqual(len(sent), 2)
+
+    @patch("src.simple_sharepoint.api.requests.get")
+    def test_token_refreshed_once_under_contention(self, req_get):
+        api = SharepointApi(site_url, client_id, client_secret)
+        req_get.reset_mock()
+
+        def fetch_token(*args, **kwargs):
+            time.sleep(0.05)
+            return mock.Mock(json=lambda: {"token_type": "Bearer", "access_token": "abc",
+                                           "expires_on": str(int(time.time()) + 3600)})
+
+        req_get.side_effect = fetch_token
+        threads = [threading.Thread(target=api._get_header_access_token) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(req_get.call_count, 1)
+
+    @patch("src.simple_sharepoint.api.requests.get")
+    def test_batch_sends_writes_in_changesets_and_parses_responses(self, req_get):
+        api = SharepointApi("https://test.sharepoint.com/", client_id, client_secret)
+        response_text = "\r\n".join([
+            "--batchresponse_1",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            "HTTP/1.1 200 OK",
+            "CONTENT-TYPE: application/json;odata=nometadata",
+            "",
+            '{"Title":"Test"}',
+            "--batchresponse_1",
+            "Content-Type: multipart/mixed; boundary=changesetresponse_2",
+            "",
+            "--changesetresponse_2",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            "HTTP/1.1 204 No Content",
+            "ETag: \"2\"",
+            "",
+            "",
+            "--changesetresponse_2--",
+            "--batchresponse_1--",
+            "",
+        ])
+
+        with patch.object(api, "post", return_value=mock.Mock(text=response_text)) as post:
+            responses = api.batch([Request("GET", "_api/web"),
+                                   Request("PATCH", "_api/web/lists/GetByTitle('Test')/items(1)",
+                                           json={"Title": "New"})])
+
+        body = post.call_args.kwargs["data"].decode("utf-8")
+        self.assertIn("GET https://test.sharepoint.com/_api/web HTTP/1.1", body)
+        self.assertIn("Content-Type: multipart/mixed; boundary=changeset_", body)
+        self.assertIn('{"Title": "New"}', body)
+        self.assertEqual([x.status_code for x in responses], [200, 204])
+        self.assertEqual(responses[0].json(), {"Title": "Test"})
+        self.assertEqual(responses[1].headers["ETag"], '"2"')
+
 
 if __name__ == '__main__':
     unittest.main()
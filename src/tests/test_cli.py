@@ -0,0 +1,229 @@
+from src.simple_sharepoint import cli
+from src.simple_sharepoint.api import BatchResponse
+from src.simple_sharepoint.errors import SharePointRequestError
+from src.simple_sharepoint.sp_list import SpList
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, call, patch
+
+credentials = ["--site-url", "https://test.sharepoint.com/", "--client-id", "id", "--client-secret", "secret"]
+
+fields = [
+    {"InternalName": "Title", "FieldTypeKind": 2},
+    {"InternalName": "Tags", "FieldTypeKind": 15, "TypeAsString": "MultiChoice"},
+    {"InternalName": "Created", "FieldTypeKind": 4, "ReadOnlyField": True},
+    {"InternalName": "Author", "FieldTypeKind": 20, "ReadOnlyField": True},
+    {"InternalName": "GUID", "FieldTypeKind": 14, "ReadOnlyField": True},
+    {"InternalName": "_UIVersionString", "FieldTypeKind": 2, "ReadOnlyField": True},
+    {"InternalName": "ContentTypeId", "FieldTypeKind": 25, "Hidden": True},
+]
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        site = MagicMock()
+        site.sp.get.return_value.json.return_value = {
+            "ListItemEntityTypeFullName": "SP.Data.TestListItem", "value": fields}
+        self.sp_list = SpList(site, "Test")
+        self.sp_list.iter_list_records = MagicMock()
+        self.sp_list.get_list_records_parallel = MagicMock()
+        self.sp_list.site.sp.requests_sent = 3
+        self.sp_list.site.sp.retries = 0
+
+        return super().setUp()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def test_export_streams_ndjson(self):
+        self.sp_list.iter_list_records.return_value = iter([{"Id": 1, "Title": "a"}, {"Id": 2, "Title": "b"}])
+        path = os.path.join(self.directory.name, "out.ndjson")
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()) as err:
+            code = cli.main(credentials + ["export", "Test", "--output", path, "--select", "Id,Title"])
+
+        self.assertEqual(code, 0)
+        with open(path) as f:
+            self.assertEqual([json.loads(x) for x in f], [{"Id": 1, "Title": "a"}, {"Id": 2, "Title": "b"}])
+        self.assertIn("exported 2 items", err.getvalue())
+        self.assertIn("3 requests", err.getvalue())
+
+    def test_export_with_concurrency_reads_partitions(self):
+        self.sp_list.get_list_records_parallel.return_value = iter([])
+        path = os.path.join(self.directory.name, "out.csv")
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            cli.main(credentials + ["export", "Test", "--output", path, "--format", "csv", "--concurrency", "4"])
+
+        self.sp_list.get_list_records_parallel.assert_called_once_with(
+            workers=4, partition_size=5000, select=None, row_limit=5000)
+
+    def test_import_csv_sends_batches(self):
+        path = os.path.join(self.directory.name, "in.csv")
+        with open(path, "w") as f:
+            f.write("Id,Title\n,new one\n7,changed\n,new two\n")
+
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [BatchResponse(204, {}, "") for _ in reqs]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()) as err:
+            code = cli.main(credentials + ["import", "Test", "--input", path, "--format", "csv", "--batch-size", "2"])
+
+        self.assertEqual(code, 0)
+        batches = [c.args[0] for c in self.sp_list.site.sp.batch.call_args_list]
+        self.assertEqual([len(x) for x in batches], [2, 1])
+        add, update = batches[0]
+        self.assertEqual(add.method, "POST")
+        self.assertEqual(add.json, {"Title": "new one", "__metadata": {"type": "SP.Data.TestListItem"}})
+        self.assertEqual(update.method, "PATCH")
+        self.assertTrue(update.url.endswith("/items(7)"))
+        self.assertIn("imported 3 items", err.getvalue())
+
+    def test_csv_collections_round_trip(self):
+        self.sp_list.iter_list_records.return_value = iter([{"Id": 1, "Tags": ["a", "b"], "Title": "[draft"}])
+        path = os.path.join(self.directory.name, "items.csv")
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [BatchResponse(204, {}, "") for _ in reqs]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            cli.main(credentials + ["export", "Test", "--output", path, "--format", "csv"])
+            cli.main(credentials + ["import", "Test", "--input", path, "--format", "csv"])
+
+        update = self.sp_list.site.sp.batch.call_args.args[0][0]
+        self.assertEqual(update.json, {"Tags": ["a", "b"], "Title": "[draft"})
+
+    def test_import_adds_collections_in_verbose_form(self):
+        path = os.path.join(self.directory.name, "in.csv")
+        with open(path, "w") as f:
+            f.write('Title,Tags\nnew,"[""a"", ""b""]"\n')
+
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [
+            BatchResponse(201, {}, json.dumps({"Id": 10})) for _ in reqs]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + ["import", "Test", "--input", path, "--format", "csv"]), 0)
+
+        add = self.sp_list.site.sp.batch.call_args.args[0][0]
+        self.assertEqual(add.method, "POST")
+        self.assertEqual(add.json, {
+            "Title": "new", "Tags": {"results": ["a", "b"]}, "__metadata": {"type": "SP.Data.TestListItem"}})
+
+    def test_import_leaves_out_fields_that_cannot_be_written(self):
+        record = {
+            "FileSystemObjectType": 0, "Id": 7, "ServerRedirectedEmbedUri": None, "ServerRedirectedEmbedUrl": "",
+            "ContentTypeId": "0x0100", "Title": "a", "Tags": ["x"], "Created": "2024-01-01T00:00:00Z",
+            "AuthorId": 9, "Attachments": False, "GUID": "b1", "OData__UIVersionString": "1.0", "ID": 7}
+        path = os.path.join(self.directory.name, "in.ndjson")
+        with open(path, "w") as f:
+            f.write(json.dumps(record) + "\n" + json.dumps(dict(record, Id=None, ID=None)) + "\n")
+
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [
+            BatchResponse(201, {}, json.dumps({"Id": 10})) for _ in reqs]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + ["import", "Test", "--input", path]), 0)
+
+        update, add = self.sp_list.site.sp.batch.call_args.args[0]
+        self.assertTrue(update.url.endswith("/items(7)"))
+        self.assertEqual(update.json, {"Title": "a", "Tags": ["x"]})
+        self.assertEqual(add.json, {
+            "Title": "a", "Tags": {"results": ["x"]}, "__metadata": {"type": "SP.Data.TestListItem"}})
+
+    def test_import_reports_failures(self):
+        path = os.path.join(self.directory.name, "in.ndjson")
+        with open(path, "w") as f:
+            f.write('{"Title": "a"}\n')
+
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [BatchResponse(400, {}, "bad") for _ in reqs]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()) as err:
+            code = cli.main(credentials + ["import", "Test", "--input", path])
+
+        self.assertEqual(code, 1)
+        self.assertIn("1 failed", err.getvalue())
+
+    def test_import_with_journal_sends_batches_and_skips_completed_rows(self):
+        path = os.path.join(self.directory.name, "in.ndjson")
+        journal = os.path.join(self.directory.name, "journal.db")
+        with open(path, "w") as f:
+            f.write('{"Title": "a"}\n{"Title": "b"}\n{"Id": 7, "Title": "c"}\n')
+
+        def batch(reqs):
+            return [BatchResponse(201, {}, json.dumps({"Id": 10})) for _ in reqs]
+
+        self.sp_list.site.sp.batch.side_effect = batch
+        args = ["import", "Test", "--input", path, "--journal", journal, "--job-id", "load-1", "--batch-size", "2"]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + args), 0)
+
+        self.assertEqual([len(c.args[0]) for c in self.sp_list.site.sp.batch.call_args_list], [2, 1])
+        self.sp_list.site.sp.post.assert_not_called()
+        self.sp_list.site.sp.patch.assert_not_called()
+
+        # rerunning the same job sends nothing
+        self.sp_list.site.sp.batch.reset_mock()
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + args), 0)
+
+        self.sp_list.site.sp.batch.assert_not_called()
+
+    def test_import_rerun_goes_on_after_rejected_rows(self):
+        path = os.path.join(self.directory.name, "in.ndjson")
+        journal = os.path.join(self.directory.name, "journal.db")
+        with open(path, "w") as f:
+            f.write('{"Title": "bad"}\n{"Title": "b"}\n')
+
+        def batch(reqs):
+            return [BatchResponse(400, {}, "bad value") if x.json["Title"] == "bad"
+                    else BatchResponse(201, {}, json.dumps({"Id": 10})) for x in reqs]
+
+        self.sp_list.site.sp.batch.side_effect = batch
+        args = ["import", "Test", "--input", path, "--journal", journal, "--job-id", "load-1"]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + args), 1)
+
+        # the rejected row is not sent again and new rows are imported
+        with open(path, "a") as f:
+            f.write('{"Title": "c"}\n')
+        self.sp_list.site.sp.batch.reset_mock()
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + args), 0)
+
+        sent = [x.json["Title"] for c in self.sp_list.site.sp.batch.call_args_list for x in c.args[0]]
+        self.assertEqual(sent, ["c"])
+
+    def test_import_reports_replayed_entries_that_fail(self):
+        path = os.path.join(self.directory.name, "in.ndjson")
+        journal = os.path.join(self.directory.name, "journal.db")
+        with open(path, "w") as f:
+            f.write('{"Title": "a"}\n')
+
+        # a server error leaves the row pending, the replay is then rejected for good
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [BatchResponse(503, {}, "busy") for _ in reqs]
+        self.sp_list.site.sp.post.side_effect = SharePointRequestError(
+            "SharePoint POST request failed", "400 bad value", 400)
+        args = ["import", "Test", "--input", path, "--journal", journal, "--job-id", "load-1"]
+
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()):
+            self.assertEqual(cli.main(credentials + args), 1)
+
+        with open(path, "w") as f:
+            f.write('{"Title": "b"}\n')
+        self.sp_list.site.sp.batch.side_effect = lambda reqs: [
+            BatchResponse(201, {}, json.dumps({"Id": 11})) for _ in reqs]
+        with patch.object(cli, "_connect", return_value=self.sp_list), patch("sys.stderr", new=io.StringIO()) as err:
+            self.assertEqual(cli.main(credentials + args), 1)
+
+        self.assertIn("failed: replayed add", err.getvalue())
+        self.assertIn("imported 1 items", err.getvalue())
+        self.assertEqual(self.sp_list.site.sp.batch.call_args.args[0][0].json["Title"], "b")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from src.simple_sharepoint.codec import FieldCodecs
+from src.simple_sharepoint.listitem import ListItem, AttributeMap
+from datetime import datetime, timezone
+from decimal import Decimal
+import unittest
+from unittest.mock import MagicMock
+
+
+class TestFieldCodecs(unittest.TestCase):
+    def setUp(self):
+        self.fields = [
+            {"InternalName": "Title", "FieldTypeKind": 2},
+            {"InternalName": "Due", "FieldTypeKind": 4},
+            {"InternalName": "Price", "FieldTypeKind": 10},
+            {"InternalName": "Tags", "FieldTypeKind": 15},
+            {"InternalName": "Owner", "FieldTypeKind": 20, "TypeAsString": "User"},
+            {"InternalName": "Related", "FieldTypeKind": 7, "AllowMultipleValues": True},
+        ]
+        self.codecs = FieldCodecs.from_fields(self.fields)
+        self.record = {
+            "Id": 1,
+            "Title": "Test Value",
+            "Due": "2024-03-01T08:00:00Z",
+            "Price": 12.5,
+            "Tags": {"results": ["a", "b"]},
+            "OwnerId": 9,
+            "RelatedId": [1, 2],
+        }
+
+        return super().setUp()
+
+    def test_decode_record_converts_types(self):
+        decoded = self.codecs.decode_record(self.record)
+
+        self.assertEqual(decoded["Due"], datetime(2024, 3, 1, 8, tzinfo=timezone.utc))
+        self.assertEqual(decoded["Price"], Decimal("12.5"))
+        self.assertEqual(decoded["Tags"], ["a", "b"])
+        self.assertEqual(decoded["OwnerId"], 9)
+        self.assertEqual(decoded["RelatedId"], [1, 2])
+        self.assertEqual(decoded["Title"], "Test Value")
+
+    def test_decode_page_matches_decode_record(self):
+        expected = self.codecs.decode_record(self.record)
+        page = self.codecs.decode_page([dict(self.record), {"Id": 2, "Due": None}])
+
+        self.assertDictEqual(page[0], expected)
+        self.assertIsNone(page[1]["Due"])
+
+    def test_encode_round_trips(self):
+        encoded = self.codecs.encode_record(self.codecs.decode_record(self.record))
+
+        self.assertEqual(encoded["Due"], "2024-03-01T08:00:00Z")
+        self.assertEqual(encoded["Price"], 12.5)
+        self.assertEqual(encoded["Tags"], ["a", "b"])
+        self.assertEqual(encoded["RelatedId"], [1, 2])
+
+        verbose = self.codecs.encode_record(self.codecs.decode_record(self.record), verbose=True)
+        self.assertEqual(verbose["Tags"], {"results": ["a", "b"]})
+        self.assertEqual(verbose["RelatedId"], {"results": [1, 2]})
+        self.assertEqual(verbose["Due"], "2024-03-01T08:00:00Z")
+
+    def test_list_item_uses_codecs(self):
+        attribute_maps = [
+            AttributeMap("title", "Title", True),
+            AttributeMap("due", "Due", True),
+        ]
+        list_item = ListItem.from_sharepoint_record(self.record, MagicMock(), attribute_maps, codecs=self.codecs)
+
+        self.assertIsInstance(list_item.due, datetime)
+        self.assertDictEqual(list_item._to_upload_format("change"), {})
+
+        list_item.due = datetime(2024, 4, 1, tzinfo=timezone.utc)
+        self.assertDictEqual(list_item._to_upload_format("change"), {"Due": "2024-04-01T00:00:00Z"})
+
+    def test_list_item_encodes_collections_by_payload_format(self):
+        attribute_maps = [
+            AttributeMap("title", "Title", True),
+            AttributeMap("tags", "Tags", True),
+        ]
+        sp_list = MagicMock(item_type="SP.Data.TestListItem")
+        list_item = ListItem.from_sharepoint_record(self.record, sp_list, attribute_maps, codecs=self.codecs)
+
+        list_item.tags = ["a", "c"]
+        self.assertDictEqual(list_item._to_upload_format("change"), {"Tags": ["a", "c"]})
+        self.assertEqual(list_item._to_upload_format("all")["Tags"], ["a", "c"])
+
+        new_item = list_item.duplicate()
+        self.assertEqual(new_item._to_upload_format("new")["Tags"], {"results": ["a", "c"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
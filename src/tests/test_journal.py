@@ -0,0 +1,177 @@
+from src.simple_sharepoint.errors import SharePointRequestError
+from src.simple_sharepoint.journal import WriteJournal
+from src.simple_sharepoint.sp_list import SpList
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, call, patch
+
+
+class TestWriteJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.db")
+
+        self.site = MagicMock()
+        self.site.sp.get.return_value.json.return_value = {
+            "ListItemEntityTypeFullName": "SP.Data.TestListItem"}
+        self.site.sp.post.return_value.json.return_value = {"Id": 10}
+        self.sp_list = SpList(self.site, "Test")
+        self.sp_list.use_journal(self.path, client_key_field="ClientKey", job_id="job-1")
+
+        return super().setUp()
+
+    def tearDown(self):
+        self.sp_list.journal.close()
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def test_completed_operations_are_skipped_on_rerun(self):
+        self.sp_list.add_list_item({"Title": "a", "ClientKey": "row-1"})
+        self.sp_list.update_list_item(3, {"Title": "b"})
+        self.sp_list.journal.close()
+
+        self.sp_list.use_journal(self.path, client_key_field="ClientKey", job_id="job-1")
+        self.assertIsNone(self.sp_list.add_list_item({"Title": "a", "ClientKey": "row-1"}))
+        self.assertIsNone(self.sp_list.update_list_item(3, {"Title": "b"}))
+
+        self.assertEqual(self.site.sp.post.call_count, 1)
+        self.assertEqual(self.site.sp.patch.call_count, 1)
+
+    def test_repeated_identical_update_in_one_run_is_sent(self):
+        self.sp_list.update_list_item(3, {"Status": "Open"})
+        self.sp_list.update_list_item(3, {"Status": "Closed"})
+        self.assertIsNotNone(self.sp_list.update_list_item(3, {"Status": "Open"}))
+
+        self.assertEqual(self.site.sp.patch.call_count, 3)
+
+    def test_duplicate_adds_in_one_run_are_sent(self):
+        self.sp_list.add_list_item({"Title": "dup"})
+        self.sp_list.add_list_item({"Title": "dup"})
+
+        self.assertEqual(self.site.sp.post.call_count, 2)
+
+    def test_rerun_only_skips_as_many_duplicates_as_completed(self):
+        self.sp_list.add_list_item({"Title": "dup"})
+        self.sp_list.journal.close()
+
+        self.sp_list.use_journal(self.path, job_id="job-1")
+        self.assertIsNone(self.sp_list.add_list_item({"Title": "dup"}))
+        self.assertIsNotNone(self.sp_list.add_list_item({"Title": "dup"}))
+
+        self.assertEqual(self.site.sp.post.call_count, 2)
+
+    def test_new_job_does_not_skip_operations_of_other_jobs(self):
+        self.sp_list.update_list_item(3, {"Status": "Open"})
+        self.sp_list.journal.close()
+
+        self.sp_list.use_journal(self.path, job_id="job-2")
+        self.assertIsNotNone(self.sp_list.update_list_item(3, {"Status": "Open"}))
+
+        self.assertEqual(self.site.sp.patch.call_count, 2)
+
+    def test_replayed_operation_is_skipped_when_job_is_rerun(self):
+        self.site.sp.patch.side_effect = Exception("connection lost")
+        with self.assertRaises(Exception):
+            self.sp_list.update_list_item(3, {"Title": "b"})
+        self.sp_list.journal.close()
+
+        self.site.sp.patch.side_effect = None
+        self.sp_list.use_journal(self.path, job_id="job-1")
+        self.sp_list.replay_journal()
+        self.assertIsNone(self.sp_list.update_list_item(3, {"Title": "b"}))
+
+        self.assertEqual(self.site.sp.patch.call_count, 2)
+
+    def test_failed_operation_stays_pending_and_is_replayed(self):
+        self.site.sp.patch.side_effect = Exception("connection lost")
+        with self.assertRaises(Exception):
+            self.sp_list.update_list_item(3, {"Title": "b"})
+
+        self.assertEqual([x.item_id for x in self.sp_list.journal.pending("Test")], [3])
+
+        self.site.sp.patch.side_effect = None
+        self.assertEqual(self.sp_list.replay_journal(), 1)
+        self.assertEqual(self.sp_list.journal.pending("Test"), [])
+
+    def test_replay_goes_on_when_an_entry_fails_permanently(self):
+        self.site.sp.patch.side_effect = Exception("connection lost")
+        for item_id in (3, 4):
+            with self.assertRaises(Exception):
+                self.sp_list.update_list_item(item_id, {"Title": "b"})
+        self.sp_list.journal.close()
+
+        def patch_item(url, json=None, headers=None):
+            if url.endswith("items(3)"):
+                raise SharePointRequestError("SharePoint PATCH request failed", "400 bad value", 400)
+            return MagicMock()
+
+        self.site.sp.patch.side_effect = patch_item
+        self.sp_list.use_journal(self.path, job_id="job-1")
+        on_error = MagicMock()
+        self.assertEqual(self.sp_list.replay_journal(on_error=on_error), 1)
+
+        on_error.assert_called_once()
+        self.assertEqual(on_error.call_args.args[0].item_id, 3)
+        self.assertEqual(self.sp_list.journal.pending("Test"), [])
+        self.assertEqual([x.item_id for x in self.sp_list.journal.failed("Test")], [3])
+
+        # the failed entry is neither replayed nor sent again by the rerun
+        self.site.sp.patch.reset_mock()
+        self.assertEqual(self.sp_list.replay_journal(), 0)
+        self.assertIsNone(self.sp_list.update_list_item(3, {"Title": "b"}))
+        self.site.sp.patch.assert_not_called()
+
+    def test_replay_gives_up_after_max_attempts(self):
+        self.site.sp.patch.side_effect = SharePointRequestError("SharePoint PATCH request failed", "503", 503)
+        with self.assertRaises(SharePointRequestError):
+            self.sp_list.update_list_item(3, {"Title": "b"})
+
+        for _ in range(WriteJournal.max_attempts - 1):
+            self.sp_list.replay_journal()
+
+        self.assertEqual(self.sp_list.journal.pending("Test"), [])
+        self.assertEqual(len(self.sp_list.journal.failed("Test")), 1)
+        self.assertEqual(self.site.sp.patch.call_count, WriteJournal.max_attempts)
+
+    def test_replayed_delete_of_missing_item_is_done(self):
+        self.site.sp.delete.side_effect = Exception("timeout")
+        with self.assertRaises(Exception):
+            self.sp_list.delete_list_item(3)
+
+        self.site.sp.delete.side_effect = SharePointRequestError(
+            "SharePoint DELETE request failed", "404 not found", 404)
+        self.assertEqual(self.sp_list.replay_journal(), 1)
+        self.assertEqual(self.sp_list.journal.pending("Test"), [])
+        self.assertEqual(self.sp_list.journal.failed("Test"), [])
+
+    def test_replay_sends_the_etag_again(self):
+        self.site.sp.patch.side_effect = Exception("connection lost")
+        with self.assertRaises(Exception):
+            self.sp_list.update_list_item(3, {"Title": "b"}, etag='"4"')
+
+        self.site.sp.patch.side_effect = None
+        self.sp_list.replay_journal()
+
+        self.assertEqual(self.site.sp.patch.call_args, call(
+            "_api/web/lists/GetByTitle('Test')/items(3)", json={"Title": "b"}, headers={'IF-MATCH': '"4"'}))
+
+    def test_unacknowledged_add_is_looked_up_by_client_key(self):
+        self.site.sp.post.side_effect = Exception("timeout")
+        with self.assertRaises(Exception):
+            self.sp_list.add_list_item({"Title": "a", "ClientKey": "row-1"})
+        self.sp_list.journal.close()
+
+        self.site.sp.post.side_effect = None
+        self.sp_list.use_journal(self.path, client_key_field="ClientKey", job_id="job-1")
+        self.site.sp.get.return_value.json.return_value = {"value": [{"Id": 7}]}
+        self.assertIsNone(self.sp_list.add_list_item({"Title": "a", "ClientKey": "row-1"}))
+
+        self.assertIn("$filter=ClientKey eq 'row-1'", self.site.sp.get.call_args.args[0])
+        self.assertEqual(self.site.sp.post.call_count, 1)
+        self.assertEqual(self.sp_list.journal.pending("Test"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
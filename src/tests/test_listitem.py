@@ -17,6 +17,7 @@ class TestListItem(unittest.TestCase):
         ]
 
         self.sp_list = MagicMock()
+        self.sp_list.update_list_item.return_value = MagicMock(headers={})
         self.sp_record = {"Id": 1, "Title": "Test Value"}
         self.list_item_from_sp = ListItem().from_sharepoint_record(
             self.sp_record, self.sp_list, self.attribute_maps
@@ -67,3 +68,57 @@ class TestListItem(unittest.TestCase):
             call.update_list_item(1, {"Id": 1, "Title": "Test Value"}),
             self.sp_list.mock_calls,
         )
+
+    def test_from_sharepoint_captures_etag(self):
+        record = {"Id": 1, "Title": "Test Value", "odata.etag": '"3"'}
+        list_item = ListItem.from_sharepoint_record(record, self.sp_list, self.attribute_maps)
+        self.assertEqual(list_item.etag, '"3"')
+        self.assertIsNone(list_item.duplicate().etag)
+
+    def test_refresh_not_modified_keeps_values(self):
+        self.list_item_from_sp.etag = '"3"'
+        self.list_item_from_sp.title = "Local Value"
+        self.sp_list.get_list_item.return_value = MagicMock(status_code=304)
+
+        self.assertFalse(self.list_item_from_sp.refresh())
+        self.sp_list.get_list_item.assert_called_once_with(1, etag='"3"')
+        self.sp_list.get_list_item.return_value.json.assert_not_called()
+        self.assertEqual(self.list_item_from_sp.title, "Local Value")
+
+    def test_refresh_modified_updates_values_and_etag(self):
+        response = MagicMock(status_code=200, headers={"ETag": '"4"'})
+        response.json.return_value = {"Id": 1, "Title": "Server Value", "odata.etag": '"4"'}
+        self.sp_list.get_list_item.return_value = response
+
+        self.assertTrue(self.list_item_from_sp.refresh())
+        self.assertEqual(self.list_item_from_sp.title, "Server Value")
+        self.assertEqual(self.list_item_from_sp.etag, '"4"')
+        self.assertDictEqual(self.list_item_from_sp.record_changes, {})
+
+    def test_save_match_etag_sends_etag(self):
+        self.list_item_from_sp.etag = '"3"'
+        self.list_item_from_sp.title = "Changed"
+        self.list_item_from_sp.save(match_etag=True)
+        self.assertIn(
+            call.update_list_item(1, {"Title": "Changed"}, etag='"3"'),
+            self.sp_list.mock_calls,
+        )
+
+    def test_save_keeps_etag_returned_by_update(self):
+        self.sp_list.update_list_item.return_value = MagicMock(headers={"ETag": '"5"'})
+        self.list_item_from_sp.etag = '"4"'
+        self.list_item_from_sp.title = "Changed"
+        self.list_item_from_sp.save()
+
+        self.assertEqual(self.list_item_from_sp.etag, '"5"')
+
+    def test_save_without_etag_header_keeps_etag(self):
+        self.list_item_from_sp.etag = '"4"'
+        self.list_item_from_sp.title = "Changed"
+        self.list_item_from_sp.save()
+
+        self.assertEqual(self.list_item_from_sp.etag, '"4"')
+
+    def test_delete_match_etag_without_etag_raises_error(self):
+        with self.assertRaises(SharePointListItemError):
+            self.list_item_from_sp.delete(match_etag=True)
@@ -0,0 +1,191 @@
+from src.simple_sharepoint.api import BatchResponse
+from src.simple_sharepoint.field import FieldEnum, FieldSpec
+from src.simple_sharepoint.listitem import AttributeMap
+from src.simple_sharepoint.sp_list import SpList
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, call, patch
+
+
+class TestSpList(unittest.TestCase):
+    def setUp(self):
+        self.site = MagicMock()
+        self.site.sp.get.return_value.json.return_value = {
+            "ListItemEntityTypeFullName": "SP.Data.TestListItem"}
+        self.sp_list = SpList(self.site, "Test")
+        self.site.sp.get.reset_mock()
+
+        return super().setUp()
+
+    def test_iter_list_records_follows_next_link(self):
+        pages = [
+            {"value": [{"Id": 1}, {"Id": 2}], "odata.nextLink": "https://next"},
+            {"value": [{"Id": 3}]},
+        ]
+        self.site.sp.get.return_value.json.side_effect = pages
+
+        records = list(self.sp_list.iter_list_records(row_limit=2))
+
+        self.assertEqual([x["Id"] for x in records], [1, 2, 3])
+        self.assertEqual(self.site.sp.get.call_args_list[1], call("https://next", headers=None))
+
+    def test_get_list_records_parallel_partitions_by_id(self):
+        def fetch_partition(start, stop, select=None, row_limit=5000):
+            return [{"ID": x} for x in range(start, min(stop, 11))]
+
+        with patch.object(self.sp_list, "_max_item_id", return_value=10), \
+                patch.object(self.sp_list, "_fetch_partition", side_effect=fetch_partition) as fp:
+            records = list(self.sp_list.get_list_records_parallel(workers=3, partition_size=4))
+
+        self.assertEqual([x["ID"] for x in records], list(range(1, 11)))
+        self.assertCountEqual([c.args[:2] for c in fp.call_args_list], [(1, 5), (5, 9), (9, 13)])
+
+    def test_get_list_records_parallel_reads_ahead_a_bounded_window(self):
+        fetched = []
+
+        def fetch_partition(start, stop, select=None, row_limit=5000):
+            fetched.append(start)
+            return [{"ID": start}]
+
+        with patch.object(self.sp_list, "_max_item_id", return_value=100), \
+                patch.object(self.sp_list, "_fetch_partition", side_effect=fetch_partition):
+            records = self.sp_list.get_list_records_parallel(workers=2, partition_size=1)
+            self.assertEqual(next(records), {"ID": 1})
+            self.assertLessEqual(len(fetched), 5)
+
+            self.assertEqual([x["ID"] for x in records], list(range(2, 101)))
+
+        for ordered in (True, False):
+            with patch.object(self.sp_list, "_max_item_id", return_value=10), \
+                    patch.object(self.sp_list, "_fetch_partition", side_effect=fetch_partition):
+                records = self.sp_list.get_list_records_parallel(workers=3, partition_size=2, ordered=ordered)
+                self.assertCountEqual([x["ID"] for x in records], [1, 3, 5, 7, 9])
+
+    def test_fetch_partition_filters_on_id_range(self):
+        self.site.sp.get.return_value.json.return_value = {"value": []}
+        self.sp_list._fetch_partition(1, 5)
+
+        url = self.site.sp.get.call_args.args[0]
+        self.assertIn("$filter=ID ge 1 and ID lt 5", url)
+
+    def test_iter_list_pages_adds_expand_and_select(self):
+        self.site.sp.get.return_value.json.return_value = {"value": []}
+        list(self.sp_list.iter_list_pages(select=["Title"], expand={"Author": ["Title", "EMail"]}))
+
+        url = self.site.sp.get.call_args.args[0]
+        self.assertIn("$select=Title,Author/Title,Author/EMail", url)
+        self.assertIn("$expand=Author", url)
+
+    def test_iter_list_items_resolves_lookups_once_per_page(self):
+        fields = [
+            {"InternalName": "Author", "FieldTypeKind": 20, "TypeAsString": "User"},
+            {"InternalName": "Category", "FieldTypeKind": 7, "LookupList": "{abc}", "LookupField": "Title"},
+        ]
+        page = {"value": [
+            {"Id": 1, "AuthorId": 5, "CategoryId": 2},
+            {"Id": 2, "AuthorId": 5, "CategoryId": 3},
+            {"Id": 3, "AuthorId": 6, "CategoryId": None},
+        ]}
+        self.site.sp.get.return_value.json.return_value = page
+
+        def batch(reqs):
+            results = []
+            for req in reqs:
+                if "siteusers" in req.url:
+                    value = [{"Id": 5, "Title": "Ann"}, {"Id": 6, "Title": "Bob"}]
+                else:
+                    value = [{"Id": 2, "Title": "Red"}, {"Id": 3, "Title": "Blue"}]
+                results.append(BatchResponse(200, {}, json.dumps({"value": value})))
+            return results
+
+        self.site.sp.batch.side_effect = batch
+        attribute_maps = [AttributeMap("author", "Author", False), AttributeMap("category", "Category", False)]
+
+        with patch.object(SpList, "fields", new_callable=mock.PropertyMock, return_value=fields):
+            items = list(self.sp_list.iter_list_items(attribute_maps, resolve=["Author", "Category"]))
+
+        self.assertEqual(self.site.sp.batch.call_count, 2)
+        self.assertIn("Id eq 5 or Id eq 6", self.site.sp.batch.call_args_list[0].args[0][0].url)
+        self.assertEqual([x.author["Title"] for x in items], ["Ann", "Ann", "Bob"])
+        self.assertEqual([x.category and x.category["Title"] for x in items], ["Red", "Blue", None])
+
+    def test_ensure_fields_only_sends_missing_and_changed_fields(self):
+        fields = [
+            {"Id": "f1", "InternalName": "Title", "Title": "Title", "FieldTypeKind": 2,
+             "Required": False, "EnforceUniqueValues": False},
+            {"Id": "f2", "InternalName": "Amount", "Title": "Amount", "FieldTypeKind": 9,
+             "Required": False, "EnforceUniqueValues": False},
+        ]
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(201, {}, "") for _ in reqs]
+        self.sp_list._codecs = MagicMock()
+
+        with patch.object(SpList, "fields", new_callable=mock.PropertyMock, return_value=fields):
+            results = self.sp_list.ensure_fields([
+                FieldSpec("Title", FieldEnum.Text),
+                {"title": "Amount", "field_enum": FieldEnum.Currency, "required": True},
+                FieldSpec("Due Date", FieldEnum.DateTime, static_name="DueDate"),
+            ])
+
+        self.assertDictEqual(results, {"Title": "unchanged", "Amount": "updated", "DueDate": "created"})
+        self.site.sp.batch.assert_called_once()
+        update, create = self.site.sp.batch.call_args.args[0]
+        self.assertTrue(update.url.endswith("/Fields('f2')"))
+        self.assertEqual(update.headers["X-HTTP-Method"], "MERGE")
+        self.assertEqual(update.json["FieldTypeKind"], FieldEnum.Currency.value)
+        self.assertEqual(create.json["StaticName"], "DueDate")
+        self.assertIsNone(self.sp_list._codecs)
+
+    def test_iter_list_records_with_caml_pages_by_last_id(self):
+        pages = [{"value": [{"Id": 1}, {"Id": 4}]}, {"value": [{"Id": 9}]}]
+        self.site.sp.post.return_value.json.side_effect = pages
+
+        caml = "<Where><Eq><FieldRef Name='Status'/><Value Type='Text'>Open</Value></Eq></Where>"
+        records = list(self.sp_list.iter_list_records(row_limit=2, caml_query=caml, select=["Title"]))
+
+        self.assertEqual([x["Id"] for x in records], [1, 4, 9])
+        first, second = [c.kwargs["json"]["query"] for c in self.site.sp.post.call_args_list]
+        self.assertIn(caml, first["ViewXml"])
+        self.assertIn("<FieldRef Name='Title'/>", first["ViewXml"])
+        self.assertIn("<RowLimit Paged='TRUE'>2</RowLimit>", first["ViewXml"])
+        self.assertNotIn("ListItemCollectionPosition", first)
+        self.assertEqual(second["ListItemCollectionPosition"]["PagingInfo"], "Paged=TRUE&p_ID=4")
+
+    def test_download_attachments_lists_in_one_batch_and_streams_files(self):
+        listing = [
+            BatchResponse(200, {}, json.dumps({"value": [
+                {"FileName": "a.txt", "ServerRelativeUrl": "/Lists/Test/Attachments/1/a.txt"}]})),
+            BatchResponse(200, {}, json.dumps({"value": []})),
+        ]
+        self.site.sp.batch.return_value = listing
+        self.site.sp.get.return_value.iter_content.return_value = [b"hello ", b"world"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = self.sp_list.download_attachments([1, 2], directory)
+
+            self.assertEqual(paths, {1: [os.path.join(directory, "1", "a.txt")], 2: []})
+            with open(paths[1][0], "rb") as f:
+                self.assertEqual(f.read(), b"hello world")
+
+        self.site.sp.batch.assert_called_once()
+        self.assertEqual(self.site.sp.get.call_args.kwargs, {"stream": True})
+
+    def test_add_attachment_streams_file_object(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report's.txt")
+            with open(path, "wb") as f:
+                f.write(b"data")
+
+            self.sp_list.add_attachment(3, path)
+
+        url = self.site.sp.post.call_args.args[0]
+        self.assertTrue(url.endswith("/items(3)/AttachmentFiles/add(FileName='report%27%27s.txt')"))
+        self.assertTrue(hasattr(self.site.sp.post.call_args.kwargs["data"], "read"))
+        self.assertEqual(self.site.sp.post.call_args.kwargs["headers"],
+                         {"Content-Type": "application/octet-stream"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+from src.simple_sharepoint.api import BatchResponse
+from src.simple_sharepoint.errors import SharePointRequestError
+from src.simple_sharepoint.sp_list import SpList
+import time
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, call, patch
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def setUp(self):
+        self.site = MagicMock()
+        self.site.sp.get.return_value.json.return_value = {
+            "ListItemEntityTypeFullName": "SP.Data.TestListItem"}
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(204, {}, "") for _ in reqs]
+        self.sp_list = SpList(self.site, "Test")
+
+        return super().setUp()
+
+    def tearDown(self):
+        self.sp_list.close()
+        return super().tearDown()
+
+    def test_updates_to_same_item_are_merged(self):
+        self.sp_list.enable_write_behind(max_delay=60)
+        self.assertIsNone(self.sp_list.update_list_item(1, {"Title": "a"}))
+        self.sp_list.update_list_item(1, {"Title": "b", "Status": "Done"})
+        self.sp_list.update_list_item(2, {"Title": "c"})
+        self.sp_list.site.sp.patch.assert_not_called()
+
+        self.sp_list.flush()
+
+        batch_requests = self.site.sp.batch.call_args.args[0]
+        self.assertEqual(len(batch_requests), 2)
+        self.assertEqual(batch_requests[0].method, "PATCH")
+        self.assertEqual(batch_requests[0].url, "_api/web/lists/GetByTitle('Test')/items(1)")
+        self.assertDictEqual(batch_requests[0].json, {"Title": "b", "Status": "Done"})
+
+    def test_flushes_when_max_items_reached(self):
+        self.sp_list.enable_write_behind(max_items=2, max_delay=60)
+        self.sp_list.update_list_item(1, {"Title": "a"})
+        self.sp_list.update_list_item(2, {"Title": "b"})
+
+        for _ in range(100):
+            if self.site.sp.batch.called:
+                break
+            time.sleep(0.01)
+
+        self.assertTrue(self.site.sp.batch.called)
+
+    def test_flushes_when_max_delay_reached(self):
+        self.sp_list.enable_write_behind(max_items=100, max_delay=0.2)
+        self.sp_list.update_list_item(1, {"Title": "a"})
+
+        for _ in range(150):
+            if self.site.sp.batch.called:
+                break
+            time.sleep(0.01)
+
+        self.assertTrue(self.site.sp.batch.called)
+        self.assertEqual(len(self.sp_list.write_behind), 0)
+
+    def test_failed_updates_raise_on_flush(self):
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(412, {}, "") for _ in reqs]
+        self.sp_list.enable_write_behind(max_delay=60)
+        self.sp_list.update_list_item(1, {"Title": "a"})
+
+        with self.assertRaises(SharePointRequestError):
+            self.sp_list.flush()
+
+    def test_failed_updates_call_on_error(self):
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(500, {}, "") for _ in reqs]
+        on_error = MagicMock()
+        self.sp_list.enable_write_behind(max_delay=60, on_error=on_error)
+        self.sp_list.update_list_item(1, {"Title": "a"})
+        self.sp_list.flush()
+
+        on_error.assert_called_once_with(1, {"Title": "a"}, mock.ANY)
+
+    def test_raising_on_error_does_not_stop_the_flusher(self):
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(500, {}, "") for _ in reqs]
+        on_error = MagicMock(side_effect=ValueError("callback failed"))
+        self.sp_list.enable_write_behind(max_delay=0.1, on_error=on_error)
+        self.sp_list.update_list_item(1, {"Title": "a"})
+
+        for _ in range(150):
+            if on_error.called:
+                break
+            time.sleep(0.01)
+        self.assertTrue(on_error.called)
+
+        # a later update is still flushed by max_delay
+        self.site.sp.batch.side_effect = lambda reqs: [BatchResponse(204, {}, "") for _ in reqs]
+        self.sp_list.update_list_item(2, {"Title": "b"})
+        for _ in range(150):
+            if self.site.sp.batch.call_count == 2:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.site.sp.batch.call_count, 2)
+        self.assertEqual(len(self.sp_list.write_behind), 0)
+
+        with self.assertRaises(SharePointRequestError) as raised:
+            self.sp_list.flush()
+        self.assertIn("callback failed", str(raised.exception))
+
+    def test_updates_with_etag_are_sent_immediately(self):
+        self.sp_list.enable_write_behind(max_delay=60)
+        self.sp_list.update_list_item(1, {"Title": "a"}, etag='"2"')
+
+        self.site.sp.patch.assert_called_once()
+        self.assertEqual(len(self.sp_list.write_behind), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()